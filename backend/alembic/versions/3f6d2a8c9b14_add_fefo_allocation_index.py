@@ -0,0 +1,32 @@
+"""Extend the active medicine name index with expiry_date for FEFO allocation
+
+Revision ID: 3f6d2a8c9b14
+Revises: e5a8b3f4c2d7
+Create Date: 2026-10-17 15:42:31.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6d2a8c9b14'
+down_revision: Union[str, None] = 'e5a8b3f4c2d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_medicines_active_name_expiry', 'medicines', ['name', 'expiry_date'], unique=False,
+                    postgresql_where=sa.text('is_active = true'), sqlite_where=sa.text('is_active = 1'))
+    op.drop_index('ix_medicines_active_name', table_name='medicines')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_medicines_active_name', 'medicines', ['name'], unique=False,
+                    postgresql_where=sa.text('is_active = true'), sqlite_where=sa.text('is_active = 1'))
+    op.drop_index('ix_medicines_active_name_expiry', table_name='medicines')
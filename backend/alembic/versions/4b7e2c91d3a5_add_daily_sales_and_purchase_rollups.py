@@ -0,0 +1,47 @@
+"""Add daily sales and purchase rollup tables
+
+Revision ID: 4b7e2c91d3a5
+Revises: dd693a89000f
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d3a5'
+down_revision: Union[str, None] = 'dd693a89000f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('CUID', sa.Integer(), nullable=False),
+    sa.Column('invoice_count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.DECIMAL(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['CUID'], ['customers.CUID'], ),
+    sa.PrimaryKeyConstraint('day', 'CUID')
+    )
+    op.create_table('daily_purchases',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('suid', sa.Integer(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['suid'], ['suppliers.SUID'], ),
+    sa.PrimaryKeyConstraint('day', 'suid')
+    )
+    # Populate with `python rollups.py` after upgrading.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_purchases')
+    op.drop_table('daily_sales')
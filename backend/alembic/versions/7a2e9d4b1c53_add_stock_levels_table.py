@@ -0,0 +1,47 @@
+"""Add stock_levels table
+
+Revision ID: 7a2e9d4b1c53
+Revises: 3f6d2a8c9b14
+Create Date: 2026-10-17 16:25:12.604419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2e9d4b1c53'
+down_revision: Union[str, None] = '3f6d2a8c9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_levels',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('total_quantity', sa.Integer(), nullable=False),
+    sa.Column('batch_count', sa.Integer(), nullable=False),
+    sa.Column('earliest_expiry', sa.Date(), nullable=True),
+    sa.Column('low_stock_threshold', sa.Integer(), nullable=False),
+    sa.Column('near_expiry_days', sa.Integer(), nullable=False),
+    sa.Column('is_low', sa.Boolean(), nullable=False),
+    sa.Column('expiry_alert_date', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_index('ix_stock_levels_is_low_total_quantity', 'stock_levels', ['is_low', 'total_quantity'], unique=False)
+    op.create_index('ix_stock_levels_expiry_alert_date', 'stock_levels', ['expiry_alert_date'], unique=False)
+    # Low-stock alerts read stock_levels now; the medicines index only slowed
+    # every stock decrement
+    op.drop_index('ix_medicines_quantity', table_name='medicines')
+    # Populate with `python stock.py` after upgrading.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_medicines_quantity', 'medicines', ['quantity'], unique=False)
+    op.drop_index('ix_stock_levels_expiry_alert_date', table_name='stock_levels')
+    op.drop_index('ix_stock_levels_is_low_total_quantity', table_name='stock_levels')
+    op.drop_table('stock_levels')
@@ -0,0 +1,42 @@
+"""Add counters table for purchase id allocation
+
+Revision ID: 9c1d5f0a7e62
+Revises: 4b7e2c91d3a5
+Create Date: 2026-10-17 11:03:15.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1d5f0a7e62'
+down_revision: Union[str, None] = '4b7e2c91d3a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    counters = op.create_table('counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Continue purchase ids after the highest P_ID already issued. Built from
+    # table constructs so P_ID is quoted where needed (PostgreSQL folds
+    # unquoted names to lower case).
+    purchases = sa.table('purchases', sa.column('P_ID', sa.Integer))
+    op.execute(
+        counters.insert().from_select(
+            ['name', 'value'],
+            sa.select(sa.literal('purchase_id'), sa.func.coalesce(sa.func.max(purchases.c.P_ID), 0))
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('counters')
@@ -0,0 +1,46 @@
+"""Add updated_at to medicines, customers and suppliers for list ETags
+
+Revision ID: b8e4f1a6c2d9
+Revises: 7a2e9d4b1c53
+Create Date: 2026-10-17 21:18:40.512337
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f1a6c2d9'
+down_revision: Union[str, None] = '7a2e9d4b1c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = [('medicines', 'id'), ('suppliers', 'SUID'), ('customers', 'CUID')]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    updated_at_type = sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+    # The app stamps updated_at with utcnow(); CURRENT_TIMESTAMP is local time
+    # on MySQL and PostgreSQL and could put existing rows ahead of new writes
+    now = datetime.utcnow()
+    for table, id_column in TABLES:
+        # Added nullable and backfilled, since SQLite cannot add a column
+        # with a CURRENT_TIMESTAMP default
+        op.add_column(table, sa.Column('updated_at', updated_at_type, nullable=True))
+        op.execute(sa.text(f'UPDATE {table} SET updated_at = :ts').bindparams(ts=now))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=updated_at_type, nullable=False)
+        op.create_index(f'ix_{table}_updated_at_id', table, ['updated_at', id_column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, _ in reversed(TABLES):
+        op.drop_index(f'ix_{table}_updated_at_id', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,30 @@
+"""Add indexes for the default and per-supplier /medicines listings
+
+Revision ID: c4d7e2a9f1b6
+Revises: b8e4f1a6c2d9
+Create Date: 2026-10-17 22:05:12.730418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e2a9f1b6'
+down_revision: Union[str, None] = 'b8e4f1a6c2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_medicines_active_id', 'medicines', ['is_active', 'id'], unique=False)
+    op.create_index('ix_medicines_suid_id', 'medicines', ['SUID', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_medicines_suid_id', table_name='medicines')
+    op.drop_index('ix_medicines_active_id', table_name='medicines')
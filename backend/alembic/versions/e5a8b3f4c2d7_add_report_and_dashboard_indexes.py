@@ -0,0 +1,47 @@
+"""Add indexes for report, dashboard and list query patterns
+
+Revision ID: e5a8b3f4c2d7
+Revises: 9c1d5f0a7e62
+Create Date: 2026-10-17 12:20:07.914336
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8b3f4c2d7'
+down_revision: Union[str, None] = '9c1d5f0a7e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_invoices_date_cuid', 'invoices', ['date', 'CUID'], unique=False)
+    op.create_index('ix_invoices_cuid_date', 'invoices', ['CUID', 'date'], unique=False)
+    op.create_index('ix_invoice_items_invoice_id', 'invoice_items', ['invoice_id'], unique=False)
+    op.create_index('ix_invoice_items_medicine_id', 'invoice_items', ['medicine_id'], unique=False)
+    op.create_index('ix_purchases_date_suid', 'purchases', ['date', 'suid'], unique=False)
+    op.create_index('ix_purchases_suid_date', 'purchases', ['suid', 'date'], unique=False)
+    op.create_index('ix_medicines_expiry_date_is_active', 'medicines', ['expiry_date', 'is_active'], unique=False)
+    op.create_index('ix_medicines_quantity', 'medicines', ['quantity'], unique=False)
+    op.create_index('ix_medicines_active_name', 'medicines', ['name'], unique=False,
+                    postgresql_where=sa.text('is_active = true'), sqlite_where=sa.text('is_active = 1'))
+    op.create_index('ix_activity_logs_timestamp_id', 'activity_logs', ['timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activity_logs_timestamp_id', table_name='activity_logs')
+    op.drop_index('ix_medicines_active_name', table_name='medicines')
+    op.drop_index('ix_medicines_quantity', table_name='medicines')
+    op.drop_index('ix_medicines_expiry_date_is_active', table_name='medicines')
+    op.drop_index('ix_purchases_suid_date', table_name='purchases')
+    op.drop_index('ix_purchases_date_suid', table_name='purchases')
+    op.drop_index('ix_invoice_items_medicine_id', table_name='invoice_items')
+    op.drop_index('ix_invoice_items_invoice_id', table_name='invoice_items')
+    op.drop_index('ix_invoices_cuid_date', table_name='invoices')
+    op.drop_index('ix_invoices_date_cuid', table_name='invoices')
@@ -0,0 +1,102 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from models import Medicine
+
+
+class InsufficientStock(Exception):
+    def __init__(self, name: str, requested: int, available: int | None = None):
+        message = f"Insufficient stock for {name}"
+        if available is not None:
+            message += f": requested {requested}, available {available}"
+        super().__init__(message)
+        self.name = name
+        self.requested = requested
+        self.available = available
+
+
+def take_stock(db: Session, medicine_id: int, quantity: int) -> bool:
+    """Decrement one batch if it is sellable and still holds ``quantity`` units; False if not.
+
+    The check and the decrement are one conditional UPDATE, so two tills can
+    never sell the same units even on backends without SELECT ... FOR UPDATE.
+    Archived and expired batches never match: stock_levels only counts
+    active batches. A batch that reaches zero is deactivated in the same
+    statement.
+    """
+    # is_active is assigned first: MySQL evaluates SET clauses left to
+    # right, so it must see the quantity before the decrement.
+    decrement = (
+        update(Medicine)
+        .where(
+            Medicine.id == medicine_id,
+            Medicine.is_active == True,
+            Medicine.expiry_date >= date.today(),
+            Medicine.quantity >= quantity
+        )
+        .ordered_values(
+            (Medicine.is_active, case((Medicine.quantity == quantity, False), else_=Medicine.is_active)),
+            (Medicine.quantity, Medicine.quantity - quantity)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(decrement).rowcount == 1
+
+
+def allocate_fefo(db: Session, requested: dict[str, int]) -> list[dict]:
+    """Split the requested quantity of each product name across its batches, first expiry first out.
+
+    All sellable batches of every requested name are read and locked in one
+    query (served by ix_medicines_active_name_expiry), then drawn down in
+    expiry order. Returns one allocation per batch used, with its id,
+    batch number, cost price and quantity. Raises InsufficientStock when a
+    product's active, unexpired stock does not cover the request.
+    """
+    # Rows are locked in id order, the same order create_invoice takes them
+    # through take_stock, so mixed traffic on both endpoints cannot deadlock;
+    # expiry order is applied here instead of in the query.
+    batches = db.execute(
+        select(Medicine.id, Medicine.name, Medicine.batch_number, Medicine.expiry_date, Medicine.quantity, Medicine.cost_price)
+        .where(
+            Medicine.name.in_(requested),
+            Medicine.is_active == True,
+            Medicine.expiry_date >= date.today(),
+            Medicine.quantity > 0
+        )
+        .order_by(Medicine.id)
+        .with_for_update()
+    ).all()
+
+    by_name = defaultdict(list)
+    for batch in sorted(batches, key=lambda b: (b.expiry_date, b.id)):
+        by_name[batch.name].append(batch)
+
+    allocations = []
+    for name, quantity in requested.items():
+        remaining = quantity
+        for batch in by_name[name]:
+            if remaining == 0:
+                break
+            taken = min(remaining, batch.quantity)
+            allocations.append({
+                "name": name,
+                "medicine_id": batch.id,
+                "batch_number": batch.batch_number,
+                "cost_price": batch.cost_price,
+                "quantity": taken,
+            })
+            remaining -= taken
+        if remaining:
+            raise InsufficientStock(name, quantity, quantity - remaining)
+
+    # The rows are locked where the database supports it; elsewhere a
+    # concurrent sale can still win the race, which the conditional UPDATE
+    # detects.
+    for allocation in sorted(allocations, key=lambda a: a["medicine_id"]):
+        if not take_stock(db, allocation["medicine_id"], allocation["quantity"]):
+            raise InsufficientStock(allocation["name"], requested[allocation["name"]])
+
+    return allocations
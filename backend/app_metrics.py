@@ -0,0 +1,110 @@
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+# prometheus_client picks its storage when imported: with
+# PROMETHEUS_MULTIPROC_DIR set, every uvicorn worker writes its samples to
+# files in that directory and /metrics aggregates them across workers.
+load_dotenv()
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", ["method"], multiprocess_mode="livesum"
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed, by route", ["route"])
+DB_REQUEST_TIME = Histogram(
+    "db_request_time_seconds", "Total time spent in SQL statements per request", ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "Duration of single SQL statements",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+INVOICES_CREATED = Counter("invoices_created_total", "Invoices created")
+INVOICE_ITEMS_SOLD = Counter("invoice_items_sold_total", "Invoice line items sold")
+UNITS_SOLD = Counter("units_sold_total", "Medicine units sold across all invoices")
+MEDICINES_RECEIVED = Counter("medicines_received_total", "Medicine batches added through purchases")
+MEDICINES_ARCHIVED = Counter("medicines_archived_total", "Medicine batches archived", ["reason"])
+AUTH_FAILURES = Counter("auth_failures_total", "Rejected logins and tokens", ["reason"])
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_label(scope) -> str:
+    # The route template keeps label cardinality bounded; paths that match no
+    # route (scanners, typos) share one label.
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def count(counter, amount=1):
+    """Increment a business counter without ever raising.
+
+    These run after the transaction has committed, so a metric error (e.g. a
+    negative amount) is logged rather than turning a saved write into a 500.
+    """
+    try:
+        counter.inc(amount)
+    except Exception:
+        logger.exception("Could not increment %s by %r", getattr(counter, "_name", counter), amount)
+
+
+def render():
+    """Return (body, content type) for the /metrics endpoint."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    # Drops this worker's live gauges from the aggregated output on shutdown
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Record latency and in-flight requests for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(scope["method"])
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(scope["method"], route_label(scope), str(status)).observe(
+                time.perf_counter() - started
+            )
@@ -1,10 +1,14 @@
 from passlib.context import CryptContext
-from jose import jwt, JWTError
+from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+import hashlib
 import os
+import time
+from app_metrics import AUTH_FAILURES
+from cache import TTLCache
 
 load_dotenv()
 
@@ -12,7 +16,16 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cost factor for new hashes; existing hashes verify with the rounds they were
+# made with and are rehashed on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# Verified tokens are remembered (by SHA-256, never the raw token) so repeat
+# requests skip signature verification. Entries never outlive the token's exp.
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+token_cache = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_MAXSIZE", 4096)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 def hash_password(password: str):
@@ -21,18 +34,44 @@ def hash_password(password: str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash uses other rounds."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def _verify_token(token: str) -> str:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    email = token_cache.get(key)
+    if email is not None:
+        return email
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email = payload.get("sub")
+    if email is None:
+        return None
+    ttl = min(TOKEN_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        token_cache.set(key, email, ttl)
+    return email
+
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
+    # FastAPI resolves this once per request however many dependencies use
+    # it; the result is also kept on request.state for middleware.
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
+        email = _verify_token(token)
         if email is None:
+            AUTH_FAILURES.labels("invalid_token").inc()
             raise HTTPException(status_code=401, detail="Invalid token")
+        request.state.user = email
         return email
+    except ExpiredSignatureError:
+        AUTH_FAILURES.labels("expired_token").inc()
+        raise HTTPException(status_code=401, detail="Invalid token or expired")
     except JWTError:
+        AUTH_FAILURES.labels("invalid_token").inc()
         raise HTTPException(status_code=401, detail="Invalid token or expired")
@@ -0,0 +1,80 @@
+"""Compare request throughput of the sync and async (DB_ASYNC) database modes.
+
+Starts the app under uvicorn once per mode against the same database, seeds a
+small dataset through the API, then fires concurrent GET requests at the
+read endpoints and reports throughput and latency percentiles.
+
+    python bench/async_modes.py --requests 2000 --concurrency 64
+    python bench/async_modes.py --database-url postgresql://user:pw@localhost/pharmize_bench
+
+Async mode needs the matching async driver installed (asyncpg, aiomysql or
+aiosqlite).
+"""
+import argparse
+import json
+import tempfile
+
+import harness
+
+ENDPOINTS = [
+    "/customers",
+    "/medicines",
+    "/invoices?limit=50",
+    "/sales-report?start_date=2020-01-01&end_date=2030-12-31",
+    "/purchase-report?start_date=2020-01-01&end_date=2030-12-31",
+]
+
+
+def seed(base_url, token, size):
+    for i in range(5):
+        harness.call_json(base_url, "/supplier/create", token, {"name": f"Supplier {i}", "phone": "0", "email": "s@example.com", "address": "-"})
+        harness.call_json(base_url, "/customer/create", token, {"name": f"Customer {i}", "phone": "0", "email": "c@example.com", "address": "-"})
+    harness.call_json(base_url, "/medicine/create", token, [
+        {"name": f"Medicine {i}", "batchNumber": f"B{i}", "entryDate": "2025-01-01", "expiryDate": "2030-01-01",
+         "quantity": 10_000, "costPrice": 1.5, "SUID": 1 + i % 5}
+        for i in range(size)
+    ])
+    for i in range(size):
+        harness.call_json(base_url, "/invoice/create", token, {
+            "CUID": 1 + i % 5, "date": "2025-06-01", "discount": 0, "finalTotal": 10,
+            "items": [{"medicineId": 1 + (i + k) % size, "quantity": 1, "unitPrice": 2.5} for k in range(3)]
+        })
+
+
+def run(base_url, token, requests, concurrency):
+    def send(i):
+        return harness.call(base_url, ENDPOINTS[i % len(ENDPOINTS)], token)[0]
+
+    return harness.run_load(send, requests, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark against (default: a scratch SQLite file)")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size", type=int, default=200, help="Medicines and invoices to seed")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+    results = {}
+    for mode in ("sync", "async"):
+        server, base_url = harness.start_server(database_url, args.port, DB_ASYNC="true" if mode == "async" else "false")
+        try:
+            token = harness.get_token(base_url)
+            if mode == "sync":
+                seed(base_url, token, args.size)
+            results[mode] = run(base_url, token, args.requests, args.concurrency)
+        finally:
+            harness.stop_server(server)
+
+    print(f"{'mode':<6} {'req/s':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['throughput_rps']:>8} {r['mean_ms']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
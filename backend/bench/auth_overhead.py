@@ -0,0 +1,76 @@
+"""Measure the per-request cost of authentication.
+
+Times, in-process, the pieces an authenticated request or a login pays for:
+token verification with a cold and a warm verified-token cache, and bcrypt
+hashing/verification at a few cost factors (BCRYPT_ROUNDS). Then serves the
+app under uvicorn and compares GET /protected with a valid token against an
+unauthenticated endpoint to show the end-to-end overhead.
+
+    python bench/auth_overhead.py
+    python bench/auth_overhead.py --rounds 10,12 --requests 2000 --concurrency 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import harness
+
+
+def per_call_us(func, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return round((time.perf_counter() - started) / iterations * 1_000_000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000, help="Token verifications per measurement")
+    parser.add_argument("--rounds", default="10,12,14", help="Comma-separated bcrypt cost factors to time")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8775)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/auth_bench.db"
+    os.environ.update(harness.server_env(database_url))
+    sys.path.insert(0, harness.BACKEND_DIR)
+
+    import auth
+    from passlib.context import CryptContext
+
+    tokens = [auth.create_access_token({"sub": f"user{i}@example.com"}) for i in range(args.iterations)]
+    auth.token_cache.clear()
+    print("token verification (per call)")
+    print(f"  jwt.decode              {per_call_us(lambda i: auth.jwt.decode(tokens[i], auth.SECRET_KEY, algorithms=[auth.ALGORITHM]), args.iterations):>8} us")
+    print(f"  cache miss (decode+set) {per_call_us(lambda i: auth._verify_token(tokens[i]), args.iterations):>8} us")
+    print(f"  cache hit               {per_call_us(lambda i: auth._verify_token(tokens[i]), args.iterations):>8} us")
+
+    print("bcrypt (per call)")
+    for rounds in [int(r) for r in args.rounds.split(",")]:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash("bench-password")
+        hash_ms = per_call_us(lambda i: context.hash("bench-password"), 3) / 1000
+        verify_ms = per_call_us(lambda i: context.verify("bench-password", hashed), 3) / 1000
+        print(f"  rounds={rounds:<3} hash {hash_ms:>8.1f} ms   verify {verify_ms:>8.1f} ms")
+
+    server, base_url = harness.start_server(database_url, args.port)
+    try:
+        token = harness.get_token(base_url)
+        print(f"GET /protected under load ({args.requests} requests, concurrency {args.concurrency})")
+        for label, request_token, path in (
+            ("no auth", None, "/metrics/db-pool"),
+            ("valid token", token, "/protected"),
+        ):
+            send = lambda i, t=request_token, p=path: harness.call(base_url, p, t)[0]
+            harness.run_load(send, min(50, args.requests), args.concurrency)  # warm-up
+            r = harness.run_load(send, args.requests, args.concurrency)
+            print(f"  {label:<16} {r['throughput_rps']:>8} req/s  p50 {r['p50_ms']:>7} ms  p99 {r['p99_ms']:>7} ms  errors {r['errors']}")
+    finally:
+        harness.stop_server(server)
+
+
+if __name__ == "__main__":
+    main()
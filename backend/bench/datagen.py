@@ -0,0 +1,134 @@
+"""Seed a database with a realistic pharmacy history for benchmarking.
+
+Volumes at --scale 1: 50 suppliers, 2,000 customers, 20,000 medicine batches
+(2,000 distinct products) each with its purchase line, 50,000 invoices with
+1-5 line items each, and 50,000 activity log entries, spread over two years.
+The daily rollups are rebuilt afterwards.
+
+    python bench/datagen.py --database-url postgresql://user:pw@localhost/pharmize_bench --scale 1
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_VOLUMES = {
+    "suppliers": 50,
+    "customers": 2_000,
+    "products": 2_000,
+    "batches": 20_000,
+    "invoices": 50_000,
+    "logs": 50_000,
+}
+
+CHUNK = 5_000
+
+
+def volumes(scale: float) -> dict:
+    return {name: max(1, int(count * scale)) for name, count in BASE_VOLUMES.items()}
+
+
+def _insert(conn, model, rows):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), CHUNK):
+        conn.execute(insert(model), rows[start:start + CHUNK])
+
+
+def seed(engine, scale: float = 0.2, random_seed: int = 42) -> dict:
+    """Create the schema and fill it; returns the volumes used."""
+    sys.path.insert(0, BACKEND_DIR)
+    from database import Base, SessionLocal
+    from models import ActivityLog, Customer, Invoice, InvoiceItem, Medicine, Purchase, Supplier
+    import rollups
+    import stock
+
+    rng = random.Random(random_seed)
+    v = volumes(scale)
+    today = date.today()
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        _insert(conn, Supplier, [
+            {"name": f"Supplier {i}", "phone": f"98{i:08d}", "email": f"supplier{i}@example.com",
+             "address": f"{i} Market Road"}
+            for i in range(v["suppliers"])
+        ])
+        _insert(conn, Customer, [
+            {"name": f"Customer {i}", "phone": f"97{i:08d}", "email": f"customer{i}@example.com",
+             "address": f"{i} Main Street"}
+            for i in range(v["customers"])
+        ])
+
+        medicines, purchases = [], []
+        for i in range(v["batches"]):
+            entry = today - timedelta(days=rng.randint(0, 730))
+            suid = 1 + rng.randrange(v["suppliers"])
+            quantity = rng.randint(50, 5_000)
+            cost = round(rng.uniform(0.5, 200), 2)
+            medicines.append({
+                "name": f"Medicine {i % v['products']}", "batch_number": f"BATCH-{i:06d}",
+                "entry_date": entry, "expiry_date": entry + timedelta(days=rng.randint(90, 1_100)),
+                "quantity": quantity, "cost_price": cost, "SUID": suid, "is_active": True,
+            })
+            purchases.append({
+                "P_ID": 1 + i // 20, "medicine_id": i + 1, "medicine_name": f"Medicine {i % v['products']}",
+                "suid": suid, "supplier_name": f"Supplier {suid - 1}", "quantity": quantity,
+                "unit_price": cost, "total_price": quantity * cost, "date": entry,
+            })
+        _insert(conn, Medicine, medicines)
+        _insert(conn, Purchase, purchases)
+
+        invoices, items = [], []
+        for i in range(v["invoices"]):
+            lines = [
+                {"invoice_id": i + 1, "medicine_id": 1 + rng.randrange(v["batches"]),
+                 "quantity": rng.randint(1, 5), "unit_price": round(rng.uniform(1, 250), 2)}
+                for _ in range(rng.randint(1, 5))
+            ]
+            items.extend(lines)
+            subtotal = sum(line["quantity"] * line["unit_price"] for line in lines)
+            discount = rng.choice([0, 0, 0, 5, 10])
+            invoices.append({
+                "CUID": 1 + rng.randrange(v["customers"]),
+                "date": today - timedelta(days=rng.randint(0, 730)),
+                "discount": discount, "total_amount": round(subtotal * (100 - discount) / 100, 2),
+            })
+        _insert(conn, Invoice, invoices)
+        _insert(conn, InvoiceItem, items)
+
+        now = datetime.now()
+        _insert(conn, ActivityLog, [
+            {"type": rng.choice(["addition", "invoice", "edit", "archiving"]), "message": f"Seeded event {i}",
+             "timestamp": now - timedelta(minutes=i * 20)}
+            for i in range(v["logs"])
+        ])
+
+    db = SessionLocal()
+    try:
+        rollups.backfill(db)
+        stock.refresh_stock_levels(db)
+        db.commit()
+    finally:
+        db.close()
+
+    return v
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Empty database to seed")
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    os.environ["SQLALCHEMY_DATABASE_URL"] = args.database_url
+    sys.path.insert(0, BACKEND_DIR)
+    from database import engine
+
+    print(seed(engine, args.scale))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Check that the hot report, dashboard and list queries are served by indexes.
+
+Seeds a scratch database (SQLite by default) with the app's schema and a
+realistic amount of data, runs EXPLAIN on each query the routers issue, and
+reports which ones fall back to a full table scan. Exits non-zero if any do.
+The report, /medicines and stock alert queries come from the routers' own
+query builders, so the plans checked are the ones the endpoints run.
+tests/test_query_plans.py runs the same check on SQLite.
+
+    python bench/explain_queries.py
+    python bench/explain_queries.py --database-url postgresql://user:pw@localhost/pharmize_explain
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Empty database to seed (default: a scratch SQLite file)")
+    parser.add_argument("--rows", type=int, default=20_000, help="Invoices and medicines to seed")
+    return parser.parse_args()
+
+
+# database.py reads its URL on import; when imported (by the tests) the
+# caller has configured it already
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ["SQLALCHEMY_DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/explain.db"
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import event, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database import Base  # noqa: E402
+from models import ActivityLog, Customer, Invoice, InvoiceItem, Medicine, Purchase, Supplier  # noqa: E402
+from routers.dashboard import LOW_STOCK_SORTS, NEAR_EXPIRY_SORTS, low_stock_query, near_expiry_query  # noqa: E402
+from routers.medicine import MEDICINE_SORTS, medicine_list_query  # noqa: E402
+from routers.report import (  # noqa: E402
+    purchase_filters, purchase_groups_query, purchase_items_query, sales_filters, sales_invoices_query, sales_items_query
+)
+from stock import refresh_stock_levels  # noqa: E402
+
+PAGE = 50
+
+
+def seed(engine, rows):
+    rng = random.Random(42)
+    today = date.today()
+    with engine.begin() as conn:
+        conn.execute(insert(Supplier), [
+            {"name": f"Supplier {i}", "phone": "0", "email": "s@example.com", "address": "-"} for i in range(50)
+        ])
+        conn.execute(insert(Customer), [
+            {"name": f"Customer {i}", "phone": "0", "email": "c@example.com", "address": "-"} for i in range(500)
+        ])
+        conn.execute(insert(Medicine), [
+            {"name": f"Medicine {i % 2000}", "batch_number": f"B{i}", "entry_date": today - timedelta(days=rng.randint(0, 700)),
+             "expiry_date": today + timedelta(days=rng.randint(-200, 900)), "quantity": rng.randint(0, 500),
+             "cost_price": 1.5, "SUID": 1 + i % 50, "is_active": rng.random() > 0.2}
+            for i in range(rows)
+        ])
+        conn.execute(insert(Purchase), [
+            {"P_ID": 1 + i // 20, "medicine_id": 1 + i, "medicine_name": f"Medicine {i % 2000}", "suid": 1 + i % 50,
+             "supplier_name": "-", "quantity": 10, "unit_price": 1.5, "total_price": 15.0,
+             "date": today - timedelta(days=rng.randint(0, 700))}
+            for i in range(rows)
+        ])
+        conn.execute(insert(Invoice), [
+            {"CUID": 1 + i % 500, "date": today - timedelta(days=rng.randint(0, 700)), "discount": 0, "total_amount": 10}
+            for i in range(rows)
+        ])
+        conn.execute(insert(InvoiceItem), [
+            {"invoice_id": 1 + i // 3, "medicine_id": 1 + rng.randrange(rows), "quantity": 1, "unit_price": 2.5}
+            for i in range(rows * 3)
+        ])
+        conn.execute(insert(ActivityLog), [
+            {"type": "addition", "message": "-", "timestamp": datetime.now() - timedelta(minutes=i)} for i in range(rows)
+        ])
+    with Session(engine) as db:
+        refresh_stock_levels(db)
+        db.commit()
+
+
+def queries(db):
+    today = date.today()
+    month_ago = today - timedelta(days=30)
+    sales = sales_filters(month_ago, today)
+    purchases = purchase_filters(month_ago, today)
+    return {
+        "sales report: invoices in range": sales_invoices_query(db, sales),
+        "sales report: invoices in range for customer": sales_invoices_query(db, sales_filters(month_ago, today, 7)),
+        "sales report: items in range": sales_items_query(db, sales),
+        "purchase report: purchases in range": purchase_groups_query(db, purchases),
+        "purchase report: purchases for supplier": purchase_groups_query(db, purchase_filters(month_ago, today, 3)),
+        "purchase report: items in range": purchase_items_query(db, purchases),
+        "expiry sweep": select(Medicine.id).where(Medicine.expiry_date < today, Medicine.is_active == True),
+        "dashboard: low stock": low_stock_query(db).order_by(*LOW_STOCK_SORTS["quantity"]).limit(PAGE),
+        "dashboard: near expiry": near_expiry_query(db).order_by(*NEAR_EXPIRY_SORTS["expiry_date"]).limit(PAGE),
+        "medicines: first page": medicine_list_query(db).order_by(*MEDICINE_SORTS["id"]).limit(PAGE),
+        "medicines: first page by name": medicine_list_query(db).order_by(*MEDICINE_SORTS["name"]).limit(PAGE),
+        "medicines: supplier's batches": medicine_list_query(db, suid=3).order_by(*MEDICINE_SORTS["id"]).limit(PAGE),
+        "invoice: FEFO batches for names": select(Medicine.id).where(
+            Medicine.name.in_(["Medicine 12", "Medicine 345"]), Medicine.is_active == True,
+            Medicine.expiry_date >= today, Medicine.quantity > 0).order_by(Medicine.id),
+        "logs: newest page": select(ActivityLog.id).order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(PAGE),
+    }
+
+
+def explain(engine, conn, stmt):
+    dialect = engine.dialect.name
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(dialect, "EXPLAIN ")
+
+    # Prefix the statement as it is sent, so parameters are bound exactly as
+    # the app binds them, and read the plan rows straight off the cursor.
+    def add_explain(conn, cursor, statement, parameters, context, executemany):
+        return prefix + statement, parameters
+
+    event.listen(engine, "before_cursor_execute", add_explain, retval=True)
+    try:
+        rows = conn.execute(stmt).cursor.fetchall()
+    finally:
+        event.remove(engine, "before_cursor_execute", add_explain)
+
+    if dialect == "sqlite":
+        plan = [row[-1] for row in rows]
+        full_scan = any(line.startswith("SCAN") and "INDEX" not in line for line in plan)
+    elif dialect == "postgresql":
+        plan = [row[0] for row in rows]
+        full_scan = any("Seq Scan" in line for line in plan)
+    else:
+        plan = [str(row) for row in rows]
+        full_scan = any(row[4] == "ALL" for row in rows)  # MySQL "type" column
+    return full_scan, plan
+
+
+def check_plans(engine, rows) -> list[tuple[str, bool, list]]:
+    """Create and seed the schema on ``engine`` and explain every query: (name, full scan, plan lines)."""
+    Base.metadata.create_all(bind=engine)
+    seed(engine, rows)
+
+    results = []
+    with Session(engine) as db:
+        conn = db.connection()
+        # Planner statistics for the seeded data
+        if engine.dialect.name in ("mysql", "mariadb"):
+            conn.exec_driver_sql(f"ANALYZE TABLE {', '.join(Base.metadata.tables)}")
+        else:
+            conn.exec_driver_sql("ANALYZE")
+        for name, query in queries(db).items():
+            # Router builders return ORM queries; explain the SELECT they emit
+            results.append((name, *explain(engine, conn, getattr(query, "statement", query))))
+    return results
+
+
+def main():
+    from database import engine
+
+    results = check_plans(engine, args.rows)
+    failures = 0
+    for name, full_scan, plan in results:
+        failures += full_scan
+        print(f"{'FULL SCAN' if full_scan else 'index':<10} {name}")
+        for line in plan:
+            print(f"{'':<10}   {line}")
+
+    print(f"\n{failures} of {len(results)} queries use a full table scan")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
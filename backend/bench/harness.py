@@ -0,0 +1,113 @@
+"""Shared helpers for the benchmark scripts: app server, HTTP client, stats."""
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_USER = {"username": "bench", "email": "bench@example.com", "password": "bench-password"}
+
+
+def call(base_url, path, token=None, body=None, method=None, headers=None):
+    """Send one request and return (status, headers, body bytes); HTTP errors are returned, not raised."""
+    request_headers = {"Content-Type": "application/json", **(headers or {})}
+    if token:
+        request_headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, headers=request_headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def call_json(base_url, path, token=None, body=None, method=None):
+    status, _, payload = call(base_url, path, token, body, method)
+    if status >= 400:
+        raise RuntimeError(f"{path} returned {status}: {payload[:200]!r}")
+    return json.loads(payload or b"null")
+
+
+def server_env(database_url, **overrides):
+    return dict(
+        os.environ,
+        SQLALCHEMY_DATABASE_URL=database_url,
+        SECRET_KEY=os.getenv("SECRET_KEY", "bench-secret"),
+        ALGORITHM=os.getenv("ALGORITHM", "HS256"),
+        EXPIRY_SWEEP_INTERVAL_SECONDS="0",
+        # One log line per request would dominate the measurements
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        **overrides,
+    )
+
+
+def start_server(database_url, port, workers=1, **env_overrides):
+    """Run the app under uvicorn in a subprocess and wait until it answers."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=server_env(database_url, **env_overrides)
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(base_url + "/docs", timeout=1)
+            return server, base_url
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def stop_server(server):
+    server.terminate()
+    server.wait()
+
+
+def get_token(base_url):
+    call(base_url, "/create_user", body=BENCH_USER)  # 400 if it already exists
+    login = {"email": BENCH_USER["email"], "password": BENCH_USER["password"]}
+    return call_json(base_url, "/login", body=login)["access_token"]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+def run_load(send, requests, concurrency):
+    """Call ``send(i)`` ``requests`` times from ``concurrency`` threads.
+
+    ``send`` returns the HTTP status. Returns latency percentiles (ms),
+    throughput and error count.
+    """
+    def timed(i):
+        start = time.perf_counter()
+        status = send(i)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, status in results if status >= 400),
+        "throughput_rps": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
@@ -0,0 +1,89 @@
+"""Measure bytes on the wire for the large list and report responses.
+
+Seeds a scratch database with bench/datagen.py, starts the app under uvicorn
+and fetches each endpoint as a client on a slow link would: uncompressed
+(the old behaviour), gzip, brotli, and brotli with a fields= projection of
+the columns the frontend actually renders. For each it reports the body size
+as sent, the median server round trip, and the transfer time that size
+implies at --link-mbps.
+
+    python bench/payload_size.py --scale 0.2
+    python bench/payload_size.py --database-url postgresql://user:pw@localhost/pharmize_bench --no-seed
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import harness
+
+RANGE = "start_date=2000-01-01&end_date=2100-01-01"
+
+# Endpoint -> (path, fields the frontend page renders)
+ENDPOINTS = {
+    "sales-report": (f"/sales-report?{RANGE}", "id,date,customer_name,total_amount"),
+    "purchase-report": (f"/purchase-report?{RANGE}", "purchase_id,date,supplier_name,total_amount"),
+    "invoices": ("/invoices?limit=500", "id,date,customer_name,total_amount"),
+    "medicines": ("/medicines", "id,name,expiry_date,quantity"),
+    "customers": ("/customers", "CUID,name,phone"),
+}
+
+ENCODINGS = {"identity": "identity", "gzip": "gzip", "brotli": "br"}
+
+
+def measure(base_url, token, path, encoding, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        status, headers, body = harness.call(base_url, path, token, headers={"Accept-Encoding": encoding})
+        timings.append(time.perf_counter() - started)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}: {body[:200]!r}")
+    # urllib does not decode Content-Encoding, so len(body) is what was sent
+    return len(body), headers.get("Content-Encoding", "identity"), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to read (default: a scratch SQLite file)")
+    parser.add_argument("--no-seed", action="store_true", help="Use the database as is instead of seeding it")
+    parser.add_argument("--scale", type=float, default=0.2, help="Data volume multiplier for the seed, see datagen.py")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests per variant; the median time is reported")
+    parser.add_argument("--link-mbps", type=float, default=2.0, help="Branch link speed used for the transfer estimate")
+    parser.add_argument("--port", type=int, default=8776)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/payload_bench.db"
+    os.environ.update(harness.server_env(database_url))
+    sys.path.insert(0, harness.BACKEND_DIR)
+
+    if not args.no_seed:
+        import datagen
+        from database import engine
+        print(f"seeded {datagen.seed(engine, args.scale)}")
+
+    server, base_url = harness.start_server(database_url, args.port)
+    try:
+        token = harness.get_token(base_url)
+        bytes_per_second = args.link_mbps * 1_000_000 / 8
+        print(f"{'endpoint':<16} {'variant':<16} {'bytes':>12} {'ratio':>7} {'server ms':>10} {f'@{args.link_mbps:g}Mbps ms':>12}")
+        for name, (path, fields) in ENDPOINTS.items():
+            separator = "&" if "?" in path else "?"
+            variants = [(label, path, encoding) for label, encoding in ENCODINGS.items()]
+            variants.append(("brotli+fields", f"{path}{separator}fields={fields}", "br"))
+            baseline = None
+            for label, variant_path, encoding in variants:
+                size, sent_encoding, seconds = measure(base_url, token, variant_path, encoding, args.repeat)
+                baseline = baseline or size
+                print(
+                    f"{name:<16} {label:<16} {size:>12,} {baseline / size:>6.1f}x {seconds * 1000:>10.1f}"
+                    f" {size / bytes_per_second * 1000:>12.0f}" + ("" if sent_encoding in (encoding, "identity") else f" ({sent_encoding})")
+                )
+    finally:
+        harness.stop_server(server)
+
+
+if __name__ == "__main__":
+    main()
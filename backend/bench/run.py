@@ -0,0 +1,236 @@
+"""Load-test the backend endpoints and record latency, throughput and query counts.
+
+Seeds a database with bench/datagen.py (a scratch SQLite file unless
+--database-url is given), starts the app under uvicorn, then drives each
+endpoint with --requests requests from --concurrency client threads. For every
+endpoint it reports p50/p95/p99 latency, throughput, errors and the SQL query
+count and DB time of one cold request (read from the X-DB-Query-Count and
+X-DB-Time-Ms response headers). Invoice creation is additionally run against
+a single low-stock batch to check that concurrent tills cannot oversell it.
+
+Results are written to bench/results/<timestamp>.json; pass --compare with an
+earlier file to print the change.
+
+    python bench/run.py --scale 0.2 --requests 200 --concurrency 16
+    python bench/run.py --database-url postgresql://user:pw@localhost/pharmize_bench --workers 4
+    python bench/run.py --no-seed --database-url ... --endpoints invoices,sales-report --compare bench/results/old.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import harness
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def endpoint_specs(context):
+    """name -> function(i) returning (method, path, body)."""
+    today = date.today()
+    quarter_ago = (today - timedelta(days=90)).isoformat()
+    rng = random.Random(7)
+
+    def invoice_body(i):
+        medicine_ids = rng.sample(context["medicine_ids"], k=min(3, len(context["medicine_ids"])))
+        return {
+            "CUID": rng.choice(context["customer_ids"]), "date": today.isoformat(), "discount": 0, "finalTotal": 10,
+            "items": [{"medicineId": m, "quantity": 1, "unitPrice": 2.5} for m in medicine_ids],
+        }
+
+    def fefo_body(i):
+        names = rng.sample(context["medicine_names"], k=min(3, len(context["medicine_names"])))
+        return {
+            "CUID": rng.choice(context["customer_ids"]), "date": today.isoformat(), "discount": 0, "finalTotal": 10,
+            "items": [{"name": name, "quantity": 1} for name in names],
+        }
+
+    return {
+        "invoice-create": lambda i: ("POST", "/invoice/create", invoice_body(i)),
+        "invoice-create-fefo": lambda i: ("POST", "/invoice/create-fefo", fefo_body(i)),
+        "invoices": lambda i: ("GET", "/invoices?limit=100", None),
+        "medicines": lambda i: ("GET", "/medicines", None),
+        "sales-report": lambda i: ("GET", f"/sales-report?start_date={quarter_ago}&end_date={today}", None),
+        "purchase-report": lambda i: ("GET", f"/purchase-report?start_date={quarter_ago}&end_date={today}", None),
+        "dashboard-totals": lambda i: ("GET", "/dashboard/totals", None),
+        "dashboard-monthly-sales": lambda i: ("GET", "/dashboard/monthly-sales", None),
+        "dashboard-purchase-summary": lambda i: ("GET", "/dashboard/purchase-summary", None),
+        "dashboard-low-quantity": lambda i: ("GET", "/dashboard/medicines/low-quantity", None),
+        "dashboard-near-expiry": lambda i: ("GET", "/dashboard/medicines/near-expiry", None),
+    }
+
+
+def load_context(base_url, token):
+    medicines = harness.call_json(base_url, "/medicines?limit=500", token)
+    customers = harness.call_json(base_url, "/customers?limit=500", token)
+    stocked = [m for m in medicines if m["quantity"] >= 100]
+    return {
+        # Keep well-stocked batches so the load phase measures the happy path
+        "medicine_ids": [m["id"] for m in stocked] or [m["id"] for m in medicines],
+        "medicine_names": sorted({m["name"] for m in stocked}) or sorted({m["name"] for m in medicines}),
+        "customer_ids": [c["CUID"] for c in customers],
+    }
+
+
+def count_queries(base_url, token, specs):
+    """Record the X-DB-Query-Count / X-DB-Time-Ms of one cold request per endpoint."""
+    counts = {}
+    for name, spec in specs.items():
+        method, path, body = spec(0)
+        _, headers, _ = harness.call(base_url, path, token, body, method)
+        counts[name] = (int(headers.get("X-DB-Query-Count", -1)), float(headers.get("X-DB-Time-Ms", 0)))
+    return counts
+
+
+def check_oversell(base_url, token, customer_id, stock, concurrency):
+    """Fire 4x more single-unit invoices at one batch than it has stock."""
+    today = date.today().isoformat()
+    name = f"OversellProbe-{datetime.now():%Y%m%d%H%M%S}"
+    harness.call_json(base_url, "/medicine/create", token, [{
+        "name": name, "batchNumber": "PROBE", "entryDate": today,
+        "expiryDate": (date.today() + timedelta(days=365)).isoformat(), "quantity": stock, "costPrice": 1, "SUID": 1,
+    }])
+    medicine = harness.call_json(base_url, f"/medicines?name={name}", token)[0]
+
+    attempts = stock * 4
+    statuses = []
+
+    def send(i):
+        status, _, _ = harness.call(base_url, "/invoice/create", token, {
+            "CUID": customer_id, "date": today, "discount": 0, "finalTotal": 1,
+            "items": [{"medicineId": medicine["id"], "quantity": 1, "unitPrice": 1}],
+        })
+        statuses.append(status)
+        return status
+
+    result = harness.run_load(send, attempts, concurrency)
+    remaining = harness.call_json(base_url, f"/medicines?name={name}&include_inactive=true", token)[0]["quantity"]
+    succeeded = statuses.count(200)
+    return {
+        "stock": stock,
+        "attempts": attempts,
+        "succeeded": succeeded,
+        "remaining_quantity": remaining,
+        "oversold": succeeded > stock or remaining < 0,
+        "invoices_per_sec": result["throughput_rps"],
+        "p95_ms": result["p95_ms"],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=harness.BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results, baseline=None):
+    header = f"{'endpoint':<28} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'queries':>8} {'db ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results["endpoints"].items():
+        line = (f"{name:<28} {r['throughput_rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+                f"{r['errors']:>7} {r.get('queries_per_request', '-'):>8} {r.get('db_time_ms', '-'):>8}")
+        old = (baseline or {}).get("endpoints", {}).get(name)
+        if old:
+            line += f"   p95 {r['p95_ms'] - old['p95_ms']:+.2f} ms, req/s {r['throughput_rps'] - old['throughput_rps']:+.1f}"
+        print(line)
+    if "oversell" in results:
+        o = results["oversell"]
+        verdict = "OVERSOLD" if o["oversold"] else "ok"
+        print(f"\noversell check: {o['succeeded']}/{o['attempts']} invoices for stock {o['stock']}, "
+              f"remaining {o['remaining_quantity']} -> {verdict} ({o['invoices_per_sec']} invoices/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Database to benchmark (default: a scratch SQLite file)")
+    parser.add_argument("--no-seed", action="store_true", help="Use the database as is instead of seeding it")
+    parser.add_argument("--scale", type=float, default=0.2, help="Data volume multiplier for the seed, see datagen.py")
+    parser.add_argument("--endpoints", help="Comma-separated subset of endpoints to run")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--oversell-stock", type=int, default=50, help="Stock of the oversell probe batch; 0 skips it")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Result file (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to diff against")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.update(harness.server_env(database_url))
+    sys.path.insert(0, harness.BACKEND_DIR)
+
+    volumes = None
+    if not args.no_seed:
+        import datagen
+        from database import engine
+        started = time.perf_counter()
+        volumes = datagen.seed(engine, args.scale)
+        print(f"seeded {volumes} in {time.perf_counter() - started:.1f}s")
+
+    server, base_url = harness.start_server(database_url, args.port, args.workers)
+    try:
+        token = harness.get_token(base_url)
+        context = load_context(base_url, token)
+        specs = endpoint_specs(context)
+        if args.endpoints:
+            wanted = args.endpoints.split(",")
+            unknown = set(wanted) - set(specs)
+            if unknown:
+                parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}; choose from {', '.join(specs)}")
+            specs = {name: specs[name] for name in wanted}
+
+        # Before any load, so cached endpoints report their uncached cost
+        query_counts = count_queries(base_url, token, specs)
+
+        results = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_commit": git_commit(),
+                "database": database_url.split(":", 1)[0],
+                "volumes": volumes,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "workers": args.workers,
+            },
+            "endpoints": {},
+        }
+
+        for name, spec in specs.items():
+            def send(i, spec=spec):
+                method, path, body = spec(i)
+                return harness.call(base_url, path, token, body, method)[0]
+
+            harness.run_load(send, min(10, args.requests), args.concurrency)  # warm-up
+            results["endpoints"][name] = harness.run_load(send, args.requests, args.concurrency)
+            results["endpoints"][name]["queries_per_request"], results["endpoints"][name]["db_time_ms"] = query_counts[name]
+            print(f"{name}: done")
+
+        if "invoice-create" in specs and args.oversell_stock:
+            results["oversell"] = check_oversell(
+                base_url, token, context["customer_ids"][0], args.oversell_stock, args.concurrency)
+    finally:
+        harness.stop_server(server)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print()
+    print_report(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Measure the per-row cost of serializing list responses.
+
+Builds N in-memory medicine and invoice rows (ORM objects, no database) and
+times each way an endpoint can turn them into a JSON body:
+
+  dict + jsonable_encoder   the old get_medicines path: hand-built dicts with
+                            float() per Decimal, then FastAPI's encoder and
+                            json.dumps (JSONResponse)
+  response_model            FastAPI validating ORM rows against the
+                            endpoint's response_model, encoding, json.dumps
+  TypeAdapter + dump_json   the prebuilt list adapters in schemas.py, as used
+                            by serialization.list_response
+  orjson on dicts           FastJSONResponse rendering plain dicts
+
+    python bench/serialization.py
+    python bench/serialization.py --rows 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import harness
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per method; the fastest is reported")
+    args = parser.parse_args()
+
+    os.environ.update(harness.server_env(f"sqlite:///{tempfile.mkdtemp()}/serialization_bench.db"))
+    sys.path.insert(0, harness.BACKEND_DIR)
+    import models
+    import schemas
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from serialization import FastJSONResponse, list_response
+
+    suppliers = [models.Supplier(SUID=i, name=f"Supplier {i}") for i in range(1, 51)]
+    customers = [models.Customer(CUID=i, name=f"Customer {i}") for i in range(1, 51)]
+    medicines = [
+        models.Medicine(
+            id=i, name=f"Medicine {i % 500}", batch_number=f"B{i:06d}",
+            entry_date=date(2025, 1, 1), expiry_date=date(2026, 1, 1) + timedelta(days=i % 365),
+            quantity=i % 200, cost_price=Decimal("12.50"), description="Tablets, 10 per strip",
+            SUID=suppliers[i % 50].SUID, supplier=suppliers[i % 50], is_active=True
+        )
+        for i in range(1, args.rows + 1)
+    ]
+    invoices = [
+        models.Invoice(
+            id=i, CUID=customers[i % 50].CUID, customer=customers[i % 50], date=date(2025, 6, 1),
+            discount=Decimal("5.00"), total_amount=Decimal("75.00"),
+            items=[
+                models.InvoiceItem(id=i * 3 + j, quantity=2, unit_price=Decimal("12.50"), medicine=medicines[(i + j) % args.rows])
+                for j in range(3)
+            ]
+        )
+        for i in range(args.rows)
+    ]
+
+    def medicine_dict(m):
+        return {
+            "id": m.id, "name": m.name, "batch_number": m.batch_number,
+            "entry_date": m.entry_date, "expiry_date": m.expiry_date, "quantity": m.quantity,
+            "cost_price": float(m.cost_price), "description": m.description, "SUID": m.SUID,
+            "supplier_name": m.supplier.name if m.supplier else None, "is_active": m.is_active
+        }
+
+    def invoice_dict(inv):
+        return {
+            "id": inv.id, "CUID": inv.CUID, "customer_name": inv.customer.name, "date": inv.date,
+            "discount": float(inv.discount), "total_amount": float(inv.total_amount),
+            "items": [
+                {"id": item.id, "medicine_name": item.medicine.name, "quantity": item.quantity, "unit_price": float(item.unit_price)}
+                for item in inv.items
+            ]
+        }
+
+    def via_response_model(model, rows):
+        field = create_model_field(name="Response", type_=list[model], mode="serialization")
+        content = asyncio.run(serialize_response(field=field, response_content=rows))
+        return JSONResponse(content).body
+
+    cases = {
+        "medicines": (medicines, schemas.MedicineListItem, schemas.MedicineListAdapter, medicine_dict),
+        "invoices (3 items)": (invoices, schemas.InvoiceResponse, schemas.InvoiceListAdapter, invoice_dict),
+    }
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for label, (rows, model, adapter, to_dict) in cases.items():
+        dicts = [to_dict(row) for row in rows]
+        methods = {
+            "dict + jsonable_encoder": lambda: JSONResponse(jsonable_encoder([to_dict(row) for row in rows])).body,
+            "response_model": lambda: via_response_model(model, rows),
+            "TypeAdapter + dump_json": lambda: list_response(adapter, rows).body,
+            "orjson on dicts": lambda: FastJSONResponse(dicts).body,
+        }
+        print(label)
+        baseline = None
+        for name, func in methods.items():
+            seconds, size = best_of(func, args.repeat)
+            baseline = baseline or seconds
+            print(
+                f"  {name:<24} {seconds * 1000:>8.1f} ms  {seconds / len(rows) * 1_000_000:>6.2f} us/row"
+                f"  {baseline / seconds:>5.1f}x  {size / 1024:>7.0f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, ttl: float, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# Dashboard cache keys and how long each may be served stale (seconds). Writes
+# invalidate the keys they affect, so TTLs only bound drift from changes made
+# outside this process (other workers, the expiry date rolling over).
+DASHBOARD_TOTALS = "totals"
+DASHBOARD_MONTHLY_SALES = "monthly-sales"
+DASHBOARD_PURCHASE_SUMMARY = "purchase-summary"
+
+DASHBOARD_TTLS = {
+    DASHBOARD_TOTALS: 30,
+    DASHBOARD_MONTHLY_SALES: 300,
+    DASHBOARD_PURCHASE_SUMMARY: 300,
+}
+
+# Keys whose payload depends on medicine rows (stock, expiry, active flag)
+DASHBOARD_MEDICINE_KEYS = (DASHBOARD_TOTALS,)
+
+dashboard_cache = TTLCache(maxsize=int(os.getenv("DASHBOARD_CACHE_MAXSIZE", 128)))
@@ -0,0 +1,82 @@
+import os
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+load_dotenv()
+
+# Encodings offered, in order of preference; empty disables compression
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",") if e.strip()]
+# Bodies smaller than this are sent as is: below about a kilobyte the
+# saving does not pay for the CPU time
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+# Moderate levels: multi-megabyte reports must not spend longer compressing
+# than they save on the wire
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Flush each chunk so streamed exports reach the client as they are produced
+        compressed = self.compressor.process(body)
+        return compressed + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codings the client accepts, honouring q=0 refusals."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip())
+    return accepted
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, whichever the client accepts first in COMPRESSION_ENCODINGS.
+
+    Built on Starlette's GZip responders, so streaming responses are
+    compressed chunk by chunk, responses that already carry a
+    Content-Encoding are left alone, and Vary: Accept-Encoding is set.
+    """
+
+    def __init__(self, app: ASGIApp, encodings=None, minimum_size: int = COMPRESSION_MIN_BYTES) -> None:
+        self.app = app
+        encodings = COMPRESSION_ENCODINGS if encodings is None else encodings
+        self.encodings = [e for e in encodings if e == "gzip" or (e == "br" and brotli is not None)]
+        self.minimum_size = minimum_size
+
+    def _responder(self, scope: Scope) -> ASGIApp:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding in self.encodings:
+            if encoding not in accepted and "*" not in accepted:
+                continue
+            if encoding == "br":
+                return BrotliResponder(self.app, self.minimum_size, BROTLI_QUALITY)
+            return GZipResponder(self.app, self.minimum_size, compresslevel=GZIP_LEVEL)
+        return IdentityResponder(self.app, self.minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        await self._responder(scope)(scope, receive, send)
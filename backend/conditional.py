@@ -0,0 +1,88 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import Counter
+from rollups import upsert
+
+# Clients may reuse a cached list but must revalidate it on every use
+LIST_CACHE_CONTROL = "private, no-cache"
+
+
+def version_counter(model) -> str:
+    return f"{model.__tablename__}_version"
+
+
+def bump_versions(db: Session, *models):
+    """Increment the list version counters of ``models`` in the caller's transaction.
+
+    Call right before the commit of catalogue writes (create, update,
+    intake, archive, expiry sweep): the counter row stays locked until then,
+    which serializes writers of a table for that moment only. Counters are
+    taken in name order so writers touching several tables cannot deadlock.
+    Sales skip it; see list_etag.
+    """
+    names = sorted({version_counter(model) for model in models})
+    upsert(db, Counter, ["name"], [{"name": name, "value": 1} for name in names], increment=True)
+
+
+def list_etag(request: Request, query, model, *related) -> str:
+    """Weak ETag for the rows of ``model`` that ``query`` selects, as requested by ``request``.
+
+    Derived from the version counters of ``model`` and of the ``related``
+    models whose fields are embedded in each row (e.g. the supplier name of
+    a medicine), bumped by catalogue writes; the row count and newest
+    updated_at of the filtered set, one aggregate over the updated_at index,
+    which also catch rows leaving the set without a write (batches passing
+    their expiry date), sales and writes made outside the app; and the path
+    and query string, since filters, sort and cursor each give a different
+    body. updated_at is stamped when the statement runs, so a slow
+    transaction can commit a stamp below the newest one; the counters close
+    that gap for catalogue writes. Sales are left to updated_at, as bumping
+    a counter would serialize every invoice on one row: invoice
+    transactions are short, and a quantity change they miss is corrected by
+    the next write to the list.
+    """
+    count, last_updated = (
+        query.enable_eagerloads(False)
+        .with_entities(func.count(), func.max(model.updated_at))
+        .order_by(None)
+        .one()
+    )
+    names = [version_counter(m) for m in (model, *related)]
+    versions = dict(query.session.execute(select(Counter.name, Counter.value).where(Counter.name.in_(names))).all())
+    version = "|".join(
+        [request.url.path, request.url.query, str(count), last_updated.isoformat() if last_updated else ""]
+        + [str(versions.get(name, 0)) for name in names]
+    )
+    return f'W/"{hashlib.blake2b(version.encode(), digest_size=12).hexdigest()}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, query, model, *related) -> Optional[Response]:
+    """Set the list's ETag on ``response``; return a 304 when the client already has it.
+
+    Call before loading or serializing any rows:
+
+        cached = not_modified(request, response, query, Customer)
+        if cached:
+            return cached
+    """
+    etag = list_etag(request, query, model, *related)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = LIST_CACHE_CONTROL
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL})
+    return None
@@ -1,14 +1,92 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker  # small typo: sessionmaker is from sqlalchemy.orm
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Depends, Request
 from dotenv import load_dotenv
+import asyncio
+import functools
+import hashlib
+import inspect
 import os
+import threading
+import time
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Connection pool settings (SQLAlchemy defaults: 5 + 10 overflow, 30s timeout)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Recycle connections before MySQL's wait_timeout drops them; -1 disables
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+class PoolStats:
+    """Checkout counters for one pool, read by the /metrics/db-pool endpoint."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class _TimedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    # _do_get is where QueuePool blocks waiting for a free connection
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start, timed_out=False)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(url, poolclass):
+    # SQLite runs in-process; its pooling is left to SQLAlchemy's defaults
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL, TimedQueuePool))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -20,3 +98,248 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Read replica: set SQLALCHEMY_READ_DATABASE_URL to serve report, dashboard
+# and list endpoints (those depending on get_read_db) from a replica. Without
+# it every read goes to the primary.
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("SQLALCHEMY_READ_DATABASE_URL")
+# Reads fall back to the primary while the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+# How often replica lag is measured (per worker)
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 5))
+# After a client writes, its reads stay on the primary this long so it sees
+# its own changes (read-your-writes). Tracked per worker and, for clients
+# that send cookies, with a short-lived cookie that works across workers.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 10))
+REPLICA_STICKY_COOKIE = "read_primary"
+
+read_engine = engine
+ReadSessionLocal = SessionLocal
+
+if SQLALCHEMY_READ_DATABASE_URL:
+    read_engine = create_engine(
+        SQLALCHEMY_READ_DATABASE_URL, **_engine_options(SQLALCHEMY_READ_DATABASE_URL, TimedQueuePool)
+    )
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+class ReplicaGuard:
+    """Decides per request whether a read may go to the replica."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_writes = {}  # client key -> monotonic time of its last write
+        self._lag = None
+        self._lag_checked_at = None
+
+    @staticmethod
+    def client_key(headers) -> str | None:
+        # Clients are told apart by their bearer token; hashed, never stored raw
+        for name, value in headers:
+            if name == b"authorization":
+                return hashlib.sha256(value).hexdigest()
+        return None
+
+    def record_write(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            self._last_writes[key] = now
+            # Forget clients whose sticky window has passed
+            if len(self._last_writes) > 10_000:
+                self._last_writes = {
+                    k: t for k, t in self._last_writes.items() if now - t < REPLICA_STICKY_SECONDS
+                }
+
+    def wrote_recently(self, headers) -> bool:
+        for name, value in headers:
+            if name == b"cookie" and f"{REPLICA_STICKY_COOKIE}=1".encode() in value:
+                return True
+        written = self._last_writes.get(self.client_key(headers))
+        return written is not None and time.monotonic() - written < REPLICA_STICKY_SECONDS
+
+    def _measure_lag(self) -> float | None:
+        """Replica delay in seconds; None when the backend cannot report it."""
+        dialect = read_engine.dialect.name
+        with read_engine.connect() as conn:
+            if dialect == "postgresql":
+                return conn.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                )).scalar()
+            if dialect in ("mysql", "mariadb"):
+                status = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                if status is None:
+                    return None
+                lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+                # NULL means replication is stopped
+                return float("inf") if lag is None else float(lag)
+        return None
+
+    def replica_lag(self) -> float | None:
+        now = time.monotonic()
+        if self._lag_checked_at is None or now - self._lag_checked_at >= REPLICA_LAG_CHECK_SECONDS:
+            try:
+                lag = self._measure_lag()
+            except exc.SQLAlchemyError:
+                # An unreachable replica counts as infinitely behind
+                lag = float("inf")
+            with self._lock:
+                self._lag, self._lag_checked_at = lag, now
+        return self._lag
+
+    def use_replica(self, headers) -> bool:
+        if read_engine is engine or self.wrote_recently(headers):
+            return False
+        lag = self.replica_lag()
+        return lag is None or lag <= REPLICA_MAX_LAG_SECONDS
+
+
+replica_guard = ReplicaGuard()
+
+
+def read_session_factory(request: Request):
+    """The sessionmaker a read for this request should use: replica or primary."""
+    return ReadSessionLocal if replica_guard.use_replica(request.scope["headers"]) else SessionLocal
+
+
+def get_read_db(request: Request):
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Remember clients whose write requests succeeded so get_read_db keeps them on the primary."""
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS or read_engine is engine:
+            await self.app(scope, receive, send)
+            return
+
+        key = ReplicaGuard.client_key(scope["headers"])
+        cookie = f"{REPLICA_STICKY_COOKIE}=1; Max-Age={int(REPLICA_STICKY_SECONDS)}; Path=/; HttpOnly; SameSite=Lax"
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                if key is not None:
+                    replica_guard.record_write(key)
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_and_record)
+
+
+# Async mode: DB_ASYNC=true serves the routers from an AsyncSession on an async
+# driver instead of blocking the threadpool. The URL defaults to the sync one
+# with its driver swapped; set SQLALCHEMY_ASYNC_DATABASE_URL to override.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_database_url(sync_url, override_env):
+    url = os.getenv(override_env)
+    if url:
+        return url
+    sync_url = make_url(sync_url)
+    return sync_url.set(drivername=ASYNC_DRIVERS[sync_url.get_backend_name()])
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if DB_ASYNC:
+    async_url = _async_database_url(SQLALCHEMY_DATABASE_URL, "SQLALCHEMY_ASYNC_DATABASE_URL")
+    async_engine = create_async_engine(async_url, **_engine_options(async_url, TimedAsyncAdaptedQueuePool))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async_read_engine, AsyncReadSessionLocal = async_engine, AsyncSessionLocal
+
+    if SQLALCHEMY_READ_DATABASE_URL:
+        async_read_url = _async_database_url(SQLALCHEMY_READ_DATABASE_URL, "SQLALCHEMY_ASYNC_READ_DATABASE_URL")
+        async_read_engine = create_async_engine(
+            async_read_url, **_engine_options(async_read_url, TimedAsyncAdaptedQueuePool)
+        )
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    # The lag probe is a blocking query on the sync replica engine
+    use_replica = await asyncio.to_thread(replica_guard.use_replica, request.scope["headers"])
+    async with (AsyncReadSessionLocal if use_replica else AsyncSessionLocal)() as db:
+        yield db
+
+
+def db_endpoint(handler):
+    """Register ``handler`` as an async endpoint when DB_ASYNC is enabled.
+
+    The handler keeps its sync body and ``db: Session`` parameter; in async
+    mode its session is replaced by an AsyncSession and the body runs through
+    ``AsyncSession.run_sync``, so its queries await the async driver on the
+    event loop instead of occupying a threadpool worker. The whole body runs
+    on the event loop thread, though, so handlers with heavy CPU work
+    (password hashing, reports, search index rebuilds, bulk sync) should
+    stay plain sync handlers and keep running in the threadpool.
+    """
+    if not DB_ASYNC:
+        return handler
+
+    signature = inspect.signature(handler)
+
+    def async_dependency(parameter):
+        reads = getattr(parameter.default, "dependency", None) is get_read_db
+        return Depends(get_async_read_db if reads else get_async_db)
+
+    parameters = [
+        p.replace(default=async_dependency(p), annotation=AsyncSession) if p.name == "db" else p
+        for p in signature.parameters.values()
+    ]
+
+    @functools.wraps(handler)
+    async def endpoint(*args, db: AsyncSession, **kwargs):
+        return await db.run_sync(lambda session: handler(*args, db=session, **kwargs))
+
+    endpoint.__signature__ = signature.replace(parameters=parameters)
+    return endpoint
+
+
+def pool_status(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    if isinstance(pool, _TimedPoolMixin):
+        stats = pool.stats
+        attempts = stats.checkouts + stats.timeouts
+        status.update({
+            "checkouts": stats.checkouts,
+            "checkout_timeouts": stats.timeouts,
+            "checkout_wait_seconds_total": round(stats.wait_seconds_total, 6),
+            "checkout_wait_seconds_avg": round(stats.wait_seconds_total / attempts, 6) if attempts else 0.0,
+            "checkout_wait_seconds_max": round(stats.wait_seconds_max, 6),
+        })
+    return status
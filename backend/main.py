@@ -1,19 +1,47 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 import models, schemas
-from database import SessionLocal, engine, get_db 
-from schemas import ActivityLogSchema
-from auth import hash_password, verify_password, create_access_token, get_current_user
+from database import (
+    SessionLocal, engine, async_engine, read_engine, async_read_engine, get_db, get_read_db, db_endpoint,
+    ReadYourWritesMiddleware
+)
+from schemas import ActivityLogSchema, ActivityLogListAdapter
+from auth import hash_password, verify_and_update_password, create_access_token
 from dotenv import load_dotenv
 import os
 from models import ActivityLog
-from routers import customer, supplier, invoice, medicine, dashboard, report, protected
+from pagination import PageParams, paginate, NEXT_CURSOR_HEADER
+from serialization import FastJSONResponse, list_response, requested_fields, projection
+from app_metrics import MetricsMiddleware, AUTH_FAILURES, mark_process_dead
+from compression import CompressionMiddleware
+from profiling import QueryProfilingMiddleware, instrument, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from typing import Optional
+from tasks import run_expiry_sweeper, EXPIRY_SWEEP_INTERVAL_SECONDS
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+from routers import customer, supplier, invoice, medicine, dashboard, report, protected, metrics, stock, sync
 
 load_dotenv()
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+
 models.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = None
+    if EXPIRY_SWEEP_INTERVAL_SECONDS > 0:
+        sweeper = asyncio.create_task(run_expiry_sweeper(EXPIRY_SWEEP_INTERVAL_SECONDS))
+    yield
+    if sweeper:
+        sweeper.cancel()
+    mark_process_dead()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 frontend_url = os.getenv("FRONTEND_URL")
 
@@ -23,8 +51,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER, "ETag"],
 )
 
+for db_engine in {engine, read_engine, async_engine, async_read_engine} - {None}:
+    instrument(db_engine)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryProfilingMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 
 app.include_router(dashboard.router)
 app.include_router(supplier.router)
@@ -33,6 +69,9 @@ app.include_router(medicine.router)
 app.include_router(invoice.router)
 app.include_router(report.router)
 app.include_router(protected.router)
+app.include_router(metrics.router)
+app.include_router(stock.router)
+app.include_router(sync.router)
 
 @app.post("/create_user")
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
@@ -50,13 +89,37 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 @app.post("/login")
 def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
     db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.password):
+    valid, new_hash = verify_and_update_password(user.password, db_user.password) if db_user else (False, None)
+    if not valid:
+        AUTH_FAILURES.labels("invalid_credentials").inc()
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this password was hashed
+        db_user.password = new_hash
+        db.commit()
+
     token = create_access_token(data={"sub": db_user.email})
     return {"access_token": token, "token_type": "bearer"}
 
 
 @app.get("/api/logs", response_model=list[ActivityLogSchema])
-def get_logs(db: Session = Depends(get_db)):
-    return db.query(ActivityLog).order_by(ActivityLog.timestamp.desc()).all()
\ No newline at end of file
+@db_endpoint
+def get_logs(
+    response: Response,
+    type: Optional[str] = Query(None, description="Only logs of this type, e.g. addition, edit, archiving"),
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db)
+):
+    selected = projection(fields, ActivityLogSchema.model_fields)
+    query = db.query(ActivityLog)
+    if type:
+        query = query.filter(ActivityLog.type == type)
+
+    logs = paginate(
+        query, page, response,
+        sorts={"timestamp": (ActivityLog.timestamp, ActivityLog.id), "id": (ActivityLog.id,)},
+        default_sort="timestamp",
+        default_order="desc",
+    )
+    return list_response(ActivityLogListAdapter, logs, response, selected)
\ No newline at end of file
@@ -1,8 +1,19 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Text, Date, ForeignKey, Float, Boolean,DateTime
+from sqlalchemy import Column, Integer, String, DECIMAL, Text, Date, ForeignKey, Float, Boolean,DateTime, Index, text
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
+
+def updated_at_column():
+    # Stamped on every insert and update, ORM or Core. Microsecond precision
+    # on MySQL too, so two writes in the same second still change the ETag.
+    return Column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -19,10 +30,16 @@ class Supplier(Base):
     phone = Column(String(20), nullable=False)
     email = Column(String(255), nullable=False)
     address = Column(String(500), nullable=False)
+    updated_at = updated_at_column()
 
     medicines = relationship("Medicine", back_populates="supplier")
     purchases = relationship("Purchase", back_populates="supplier")  
 
+    __table_args__ = (
+        # List ETags (max updated_at)
+        Index("ix_suppliers_updated_at_id", "updated_at", "SUID"),
+    )
+
 class Customer(Base):
     __tablename__ = "customers"
 
@@ -31,6 +48,12 @@ class Customer(Base):
     phone = Column(String(20), nullable=False)
     email = Column(String(255), nullable=False)
     address = Column(String(500), nullable=False)
+    updated_at = updated_at_column()
+
+    __table_args__ = (
+        # List ETags (max updated_at)
+        Index("ix_customers_updated_at_id", "updated_at", "CUID"),
+    )
 
 class Medicine(Base):
     __tablename__ = "medicines"
@@ -45,10 +68,25 @@ class Medicine(Base):
     description = Column(Text)
     SUID = Column(Integer, ForeignKey("suppliers.SUID"), nullable=False)
     is_active = Column(Boolean, default=True)  # Add this column
+    updated_at = updated_at_column()  # also bumped by sales, archiving and the expiry sweep
     
     supplier = relationship("Supplier", back_populates="medicines")
     invoice_items = relationship("InvoiceItem", back_populates="medicine")
     purchases = relationship("Purchase", back_populates="medicine")
+
+    __table_args__ = (
+        # Expiry sweep
+        Index("ix_medicines_expiry_date_is_active", "expiry_date", "is_active"),
+        # Active catalogue listing, name lookups and FEFO allocation by name
+        # then expiry (partial where supported)
+        Index("ix_medicines_active_name_expiry", "name", "expiry_date", postgresql_where=text("is_active = true"), sqlite_where=text("is_active = 1")),
+        # List ETags (max updated_at)
+        Index("ix_medicines_updated_at_id", "updated_at", "id"),
+        # /medicines default listing (active batches in id order) and its
+        # ?suid= filter
+        Index("ix_medicines_active_id", "is_active", "id"),
+        Index("ix_medicines_suid_id", "SUID", "id"),
+    )
  
     
 class Purchase(Base):
@@ -68,6 +106,19 @@ class Purchase(Base):
     supplier = relationship("Supplier", back_populates="purchases")
     medicine = relationship("Medicine", back_populates="purchases")
 
+    __table_args__ = (
+        # Purchase report by date range, optionally per supplier
+        Index("ix_purchases_date_suid", "date", "suid"),
+        Index("ix_purchases_suid_date", "suid", "date"),
+    )
+
+
+
+class Counter(Base):
+    __tablename__ = "counters"
+
+    name = Column(String(50), primary_key=True)  # e.g. "purchase_id"
+    value = Column(Integer, nullable=False)
 
 
 class Invoice(Base):
@@ -82,6 +133,12 @@ class Invoice(Base):
     customer = relationship("Customer")
     items = relationship("InvoiceItem", back_populates="invoice")
 
+    __table_args__ = (
+        # Sales report by date range, optionally per customer
+        Index("ix_invoices_date_cuid", "date", "CUID"),
+        Index("ix_invoices_cuid_date", "CUID", "date"),
+    )
+
 
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
@@ -95,10 +152,63 @@ class InvoiceItem(Base):
     invoice = relationship("Invoice", back_populates="items")
     medicine = relationship("Medicine")
 
+    __table_args__ = (
+        Index("ix_invoice_items_invoice_id", "invoice_id"),
+        Index("ix_invoice_items_medicine_id", "medicine_id"),
+    )
+
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(String(50), nullable=False)  # e.g., "addition", "archiving", "edit"
     message = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Newest-first log listing with keyset pagination
+        Index("ix_activity_logs_timestamp_id", "timestamp", "id"),
+    )
+
+
+# Rollups maintained by rollups.py alongside invoice and purchase writes, so the
+# dashboard and report totals read O(days) rows instead of every transaction.
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    CUID = Column(Integer, ForeignKey("customers.CUID"), primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    total_amount = Column(DECIMAL(12, 2), nullable=False, default=0)
+
+
+class DailyPurchases(Base):
+    __tablename__ = "daily_purchases"
+
+    day = Column(Date, primary_key=True)
+    suid = Column(Integer, ForeignKey("suppliers.SUID"), primary_key=True)
+    line_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
+
+
+# Per-product stock summary maintained by stock.py whenever a product's
+# batches change, so stock alerts never scan the medicines table.
+class StockLevel(Base):
+    __tablename__ = "stock_levels"
+
+    name = Column(String(100), primary_key=True)  # matches Medicine.name
+    total_quantity = Column(Integer, nullable=False, default=0)
+    batch_count = Column(Integer, nullable=False, default=0)
+    earliest_expiry = Column(Date)  # of the active batches
+    low_stock_threshold = Column(Integer, nullable=False)  # 0 disables the alert
+    near_expiry_days = Column(Integer, nullable=False)
+    is_low = Column(Boolean, nullable=False, default=False)
+    # earliest_expiry minus near_expiry_days: the alert fires once today reaches it
+    expiry_alert_date = Column(Date)
+
+    __table_args__ = (
+        Index("ix_stock_levels_is_low_total_quantity", "is_low", "total_quantity"),
+        Index("ix_stock_levels_expiry_alert_date", "expiry_alert_date"),
+    )
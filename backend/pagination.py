@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query parameters shared by every paginated list endpoint.
+
+    Without ``limit`` the full (filtered, sorted) list is returned, which keeps
+    existing clients working. With ``limit`` the endpoint returns one page and,
+    when more rows exist, an opaque cursor for the next page in the
+    ``X-Next-Cursor`` response header.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of rows to return"),
+        sort: Optional[str] = Query(None, description="Column to sort by"),
+        order: Optional[str] = Query(None, pattern="^(asc|desc)$", description="Sort direction"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.sort = sort
+        self.order = order
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    payload = json.dumps({"s": sort, "v": [_to_json(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, columns) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort or len(payload["v"]) != len(columns):
+            raise ValueError("cursor does not match the requested sort")
+        return [_from_json(col, value) for col, value in zip(columns, payload["v"])]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def keyset_after(columns, values, descending: bool):
+    # Row-value comparison spelled out as (a > x) OR (a = x AND b > y) ...
+    # so it works on every backend and can use the composite index.
+    clauses = []
+    for i, col in enumerate(columns):
+        bound = col < values[i] if descending else col > values[i]
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal, bound))
+    return or_(*clauses)
+
+
+def paginate(query, page: PageParams, response: Response, sorts: dict, default_sort: str, default_order: str = "asc"):
+    """Apply keyset pagination to ``query`` and return the rows of one page.
+
+    ``sorts`` maps each allowed ``sort`` value to the tuple of columns that
+    order it; the last column must be unique (normally the primary key) so the
+    cursor identifies exactly one row.
+    """
+    sort = page.sort or default_sort
+    if sort not in sorts:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{sort}'. Allowed: {', '.join(sorts)}")
+    columns = sorts[sort]
+    descending = (page.order or default_order) == "desc"
+
+    if page.cursor:
+        query = query.filter(keyset_after(columns, decode_cursor(page.cursor, sort, columns), descending))
+    query = query.order_by(*[col.desc() if descending else col.asc() for col in columns])
+
+    if page.limit is None:
+        return query.all()
+
+    rows = query.limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, [getattr(last, col.key) for col in columns])
+    return rows
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from app_metrics import DB_QUERIES, DB_REQUEST_TIME, DB_STATEMENT_DURATION, route_label
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their parameters and route;
+# 0 disables the slow-query log.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+# Debug aid: log every statement of every request with its start offset and
+# duration. Verbose and includes SQL text, so keep it off in production.
+QUERY_TIMELINE = os.getenv("QUERY_TIMELINE", "false").lower() in ("1", "true", "yes")
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+_MAX_LOGGED_CHARS = 1000
+
+
+class RequestQueries:
+    """SQL statements issued while serving one request."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.timeline = []
+
+    @property
+    def route(self) -> str:
+        # Starlette stores the matched route in the scope once routing is done
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+
+_current = ContextVar("request_queries", default=None)
+
+
+def _truncate(value) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= _MAX_LOGGED_CHARS else text[:_MAX_LOGGED_CHARS] + "..."
+
+
+def _log(level: int, event_name: str, **fields):
+    logger.log(level, json.dumps({"event": event_name, **fields}, default=str))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    finished = time.perf_counter()
+    elapsed = finished - conn.info["query_start"].pop()
+    DB_STATEMENT_DURATION.observe(elapsed)
+
+    queries = _current.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+        if QUERY_TIMELINE:
+            queries.timeline.append({
+                "offset_ms": round((finished - elapsed - queries.started) * 1000, 2),
+                "duration_ms": round(elapsed * 1000, 2),
+                "statement": _truncate(statement),
+            })
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        _log(
+            logging.WARNING,
+            "slow_query",
+            route=queries.route if queries else None,
+            duration_ms=round(elapsed * 1000, 2),
+            statement=_truncate(statement),
+            parameters=_truncate(parameters),
+            executemany=executemany,
+        )
+
+
+def _handle_error(context):
+    # after_cursor_execute is skipped for failed statements
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument(engine):
+    """Time every statement run through ``engine`` (sync or AsyncEngine)."""
+    engine = getattr(engine, "sync_engine", engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryProfilingMiddleware:
+    """Count the SQL statements and DB time of each HTTP request.
+
+    The totals are added to the response as X-DB-Query-Count / X-DB-Time-Ms
+    and logged as one JSON line per request. Headers cover the statements run
+    before the response starts; the log line also includes any run while a
+    streaming body is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message["headers"]) + [
+                    (QUERY_COUNT_HEADER.lower().encode(), str(queries.count).encode()),
+                    (QUERY_TIME_HEADER.lower().encode(), f"{queries.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            DB_QUERIES.labels(route_label(scope)).inc(queries.count)
+            DB_REQUEST_TIME.labels(route_label(scope)).observe(queries.seconds)
+            fields = {
+                "method": scope["method"],
+                "route": queries.route,
+                "user": scope.get("state", {}).get("user"),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - queries.started) * 1000, 2),
+                "db_queries": queries.count,
+                "db_time_ms": round(queries.seconds * 1000, 2),
+            }
+            if QUERY_TIMELINE:
+                fields["timeline"] = queries.timeline
+            _log(logging.INFO, "request", **fields)
@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import DailyPurchases, DailySales, Invoice, InvoiceItem, Purchase
+
+
+def upsert(db: Session, model, keys: list[str], rows: list[dict], increment: bool = False):
+    """Insert rows, overwriting (or with ``increment``, adding to) the other columns of rows that already exist."""
+    if not rows:
+        return
+
+    table = model.__table__
+    columns = [c.name for c in table.columns if c.name not in keys]
+    dialect = db.get_bind().dialect.name
+
+    def merged(existing, new):
+        return existing + new if increment else new
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={c: merged(table.c[c], stmt.excluded[c]) for c in columns}
+        )
+        db.execute(stmt, rows)
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_duplicate_key_update({c: merged(table.c[c], stmt.inserted[c]) for c in columns})
+        db.execute(stmt, rows)
+    else:
+        for row in rows:
+            existing = db.get(model, tuple(row[k] for k in keys))
+            if existing:
+                for c in columns:
+                    setattr(existing, c, merged(getattr(existing, c), row[c]))
+            else:
+                db.add(model(**row))
+        db.flush()
+
+
+def record_sale(db: Session, day, cuid: int, total_amount, quantity: int):
+    """Add one invoice to the daily sales rollup, inside the caller's transaction."""
+    upsert(db, DailySales, ["day", "CUID"], [{
+        "day": day,
+        "CUID": cuid,
+        "invoice_count": 1,
+        "quantity": quantity,
+        "total_amount": total_amount,
+    }], increment=True)
+
+
+def record_purchases(db: Session, purchases: list[dict]):
+    """Add purchase lines (dicts with date, suid, quantity, total_price) to the daily rollup."""
+    grouped = defaultdict(lambda: {"line_count": 0, "quantity": 0, "total_amount": 0.0})
+    for p in purchases:
+        group = grouped[(p["date"], p["suid"])]
+        group["line_count"] += 1
+        group["quantity"] += p["quantity"]
+        group["total_amount"] += p["total_price"]
+
+    upsert(db, DailyPurchases, ["day", "suid"], [
+        {"day": day, "suid": suid, **totals} for (day, suid), totals in grouped.items()
+    ], increment=True)
+
+
+def backfill(db: Session):
+    """Rebuild both rollup tables from the invoice and purchase history."""
+    invoice_quantities = (
+        select(InvoiceItem.invoice_id, func.sum(InvoiceItem.quantity).label("quantity"))
+        .group_by(InvoiceItem.invoice_id)
+        .subquery()
+    )
+    sales = (
+        select(
+            Invoice.date,
+            Invoice.CUID,
+            func.count(Invoice.id),
+            func.coalesce(func.sum(invoice_quantities.c.quantity), 0),
+            func.sum(Invoice.total_amount)
+        )
+        .outerjoin(invoice_quantities, invoice_quantities.c.invoice_id == Invoice.id)
+        .group_by(Invoice.date, Invoice.CUID)
+    )
+    purchases = (
+        select(
+            Purchase.date,
+            Purchase.suid,
+            func.count(Purchase.id),
+            func.coalesce(func.sum(Purchase.quantity), 0),
+            func.coalesce(func.sum(Purchase.total_price), 0)
+        )
+        .where(Purchase.date.isnot(None), Purchase.suid.isnot(None))
+        .group_by(Purchase.date, Purchase.suid)
+    )
+
+    db.execute(delete(DailySales))
+    db.execute(insert(DailySales).from_select(
+        ["day", "CUID", "invoice_count", "quantity", "total_amount"], sales
+    ))
+    db.execute(delete(DailyPurchases))
+    db.execute(insert(DailyPurchases).from_select(
+        ["day", "suid", "line_count", "quantity", "total_amount"], purchases
+    ))
+    db.commit()
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        backfill(db)
+        print("Rebuilt daily_sales and daily_purchases")
+    finally:
+        db.close()
@@ -1,17 +1,22 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query, Request, Response
 import schemas, models
-from schemas import CustomerCreate, CustomerResponse, CustomerUpdate
+from schemas import CustomerCreate, CustomerResponse, CustomerUpdate, CustomerListAdapter
 from models import Customer
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, db_endpoint, get_read_db
 from auth import get_current_user
 from sqlalchemy.orm import Session
 from utils import log_activity
+from pagination import PageParams, paginate
+from serialization import list_response, requested_fields, projection
+from conditional import bump_versions, not_modified
+from cache import dashboard_cache, DASHBOARD_TOTALS
 
 router = APIRouter( tags=["Cusomter"])
 
 
 @router.post("/customer/create")
+@db_endpoint
 def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_db), user: str = Depends(get_current_user)):
     db_customer = models.Customer(
         name=customer.name,
@@ -21,8 +26,7 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
     )
     try:
         db.add(db_customer)
-        db.commit()
-        db.refresh(db_customer)
+        db.flush()  # Get db_customer.CUID
 
         # ✅ Log the addition
         log_activity(
@@ -31,6 +35,10 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
             message=f"Customer added: {db_customer.name} (CUID: {db_customer.CUID})"
         )
 
+        bump_versions(db, models.Customer)
+        db.commit()
+        dashboard_cache.invalidate(DASHBOARD_TOTALS)
+
         return {"message": "Customer added successfully", "CUID": db_customer.CUID}
     except Exception as e:
         db.rollback()
@@ -39,10 +47,34 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
 
 
 @router.get("/customers", response_model=List[CustomerResponse])
-def get_customers(db: Session = Depends(get_db), user: str = Depends(get_current_user)):
-    return db.query(Customer).all()
+@db_endpoint
+def get_customers(
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="Filter by name (case-insensitive substring)"),
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db),
+    user: str = Depends(get_current_user)
+):
+    selected = projection(fields, CustomerResponse.model_fields)
+    query = db.query(Customer)
+    if name:
+        query = query.filter(Customer.name.ilike(f"%{name}%"))
+
+    cached = not_modified(request, response, query, Customer)
+    if cached:
+        return cached
+
+    customers = paginate(
+        query, page, response,
+        sorts={"id": (Customer.CUID,), "name": (Customer.name, Customer.CUID)},
+        default_sort="id",
+    )
+    return list_response(CustomerListAdapter, customers, response, selected)
 
 @router.put("/customer/{cuid}/update")
+@db_endpoint
 def update_customer(cuid: str, updated_data: CustomerUpdate, db: Session = Depends(get_db), user: str = Depends(get_current_user)):
     customer = db.query(Customer).filter(Customer.CUID == cuid).first()
     if not customer:
@@ -51,9 +83,6 @@ def update_customer(cuid: str, updated_data: CustomerUpdate, db: Session = Depen
     for field, value in updated_data.dict(exclude_unset=True).items():
         setattr(customer, field, value)
     
-    db.commit()
-    db.refresh(customer)
-
     # Add log entry
     log_activity(
         db=db,
@@ -61,4 +90,8 @@ def update_customer(cuid: str, updated_data: CustomerUpdate, db: Session = Depen
         message=f"Customer updated: {customer.name} (CUID: {customer.CUID})"
     )
 
+    bump_versions(db, Customer)
+    db.commit()
+    db.refresh(customer)
+
     return customer
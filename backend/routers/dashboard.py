@@ -1,65 +1,105 @@
-from fastapi import APIRouter, FastAPI, Depends, HTTPException
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-import models
-from schemas import ActivityLogSchema
-from models import Customer, Supplier, Invoice, Medicine, Purchase, ActivityLog
-from datetime import datetime, timedelta
-from database import get_db
-from sqlalchemy import func, extract
+from schemas import (
+    ActivityLogSchema, LowStockAlert, NearExpiryAlert,
+    ActivityLogListAdapter, LowStockAlertListAdapter, NearExpiryAlertListAdapter
+)
+from models import Customer, Supplier, Invoice, Medicine, ActivityLog, DailySales, DailyPurchases, StockLevel
+from datetime import timedelta, date
+from database import db_endpoint, get_db, get_read_db
+from sqlalchemy import func, extract, case
 from auth import get_current_user
+from pagination import PageParams, paginate
+from serialization import list_response
+from cache import (
+    dashboard_cache, DASHBOARD_TTLS, DASHBOARD_TOTALS, DASHBOARD_MONTHLY_SALES, DASHBOARD_PURCHASE_SUMMARY
+)
 
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Cached endpoints take a primary session: a miss usually follows a write
+# that invalidated the key, and filling it from a lagging replica would cache
+# the pre-write figures for the whole TTL. Hits do not touch the database.
+def _cached(key, compute):
+    return dashboard_cache.get_or_set(key, DASHBOARD_TTLS[key], compute)
+
+
 @router.get("/totals")
+@db_endpoint
 def get_dashboard_totals(db: Session = Depends(get_db)):
-    # Count only active medicines
-    active_medicines_query = db.query(Medicine).filter(Medicine.is_active == True)
-    total_medicines = active_medicines_query.count()
-
-    # Log the active medicines query result
-    print(f"Active Medicines Count: {total_medicines}")
-
-    total_suppliers = db.query(Supplier).count()
-    total_customers = db.query(Customer).count()
-    total_invoices = db.query(Invoice).count()
-
-    return {
-        "medicines": total_medicines,
-        "suppliers": total_suppliers,
-        "customers": total_customers,
-        "invoices": total_invoices,
-    }
-
-
-# Endpoint to get medicines with quantity less than or equal to 20
-@router.get("/medicines/low-quantity")
-def get_medicines_low_quantity(db: Session = Depends(get_db)):
-    medicines = db.query(models.Medicine).filter(models.Medicine.quantity <= 20).all()
-    return medicines
-
-# Endpoint to get medicines near expiry (within the next month)
-@router.get("/medicines/near-expiry")
-def get_medicines_near_expiry(db: Session = Depends(get_db)):
-    one_month_later = datetime.now() + timedelta(days=30)
-    medicines = db.query(models.Medicine).filter(models.Medicine.expiry_date <= one_month_later).all()
-    return medicines
+    def compute():
+        # Count only active medicines
+        active_medicines_query = db.query(Medicine).filter(Medicine.is_active == True)
+        total_medicines = active_medicines_query.count()
+
+        total_suppliers = db.query(Supplier).count()
+        total_customers = db.query(Customer).count()
+        total_invoices = db.query(Invoice).count()
+
+        return {
+            "medicines": total_medicines,
+            "suppliers": total_suppliers,
+            "customers": total_customers,
+            "invoices": total_invoices,
+        }
+
+    return _cached(DASHBOARD_TOTALS, compute)
+
+
+# Stock alerts read the per-product stock_levels table (stock.py), which the
+# invoice, intake, archive and expiry paths keep current; see /stock-levels
+# for per-product thresholds.
+LOW_STOCK_SORTS = {"quantity": (StockLevel.total_quantity, StockLevel.name), "name": (StockLevel.name,)}
+NEAR_EXPIRY_SORTS = {"expiry_date": (StockLevel.earliest_expiry, StockLevel.name), "name": (StockLevel.name,)}
+
+
+def low_stock_query(db: Session):
+    return db.query(StockLevel).filter(StockLevel.is_low == True)
+
+
+def near_expiry_query(db: Session):
+    return db.query(StockLevel).filter(StockLevel.expiry_alert_date <= date.today())
+
+
+@router.get("/medicines/low-quantity", response_model=list[LowStockAlert])
+@db_endpoint
+def get_medicines_low_quantity(response: Response, page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    query = low_stock_query(db)
+    levels = paginate(
+        query, page, response,
+        sorts=LOW_STOCK_SORTS,
+        default_sort="quantity",
+    )
+    return list_response(LowStockAlertListAdapter, levels, response)
+
+@router.get("/medicines/near-expiry", response_model=list[NearExpiryAlert])
+@db_endpoint
+def get_medicines_near_expiry(response: Response, page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    query = near_expiry_query(db)
+    levels = paginate(
+        query, page, response,
+        sorts=NEAR_EXPIRY_SORTS,
+        default_sort="expiry_date",
+    )
+    return list_response(NearExpiryAlertListAdapter, levels, response)
 
 @router.get("/monthly-sales")
+@db_endpoint
 def get_monthly_sales(db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
-    try:
+    def compute():
         sales_data = (
             db.query(
-                extract("year", Invoice.date).label("year"),
-                extract("month", Invoice.date).label("month"),
-                func.sum(Invoice.total_amount).label("total")
+                extract("year", DailySales.day).label("year"),
+                extract("month", DailySales.day).label("month"),
+                func.sum(DailySales.total_amount).label("total")
             )
             .group_by("year", "month")
             .order_by("year", "month")
             .all()
         )
 
-        result = [
+        return [
             {
                 "month": f"{int(record.month):02d}-{int(record.year)}",  # e.g., "04-2025"
                 "total": float(record.total)
@@ -67,29 +107,44 @@ def get_monthly_sales(db: Session = Depends(get_db), user: dict = Depends(get_cu
             for record in sales_data
         ]
 
-        return result
+    try:
+        return _cached(DASHBOARD_MONTHLY_SALES, compute)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
     
 @router.get("/purchase-summary")
+@db_endpoint
 def get_purchase_summary(db: Session = Depends(get_db)):
-    now = datetime.now()
-    current_month_key = f"{now.month:02d}-{now.year}"
+    def compute():
+        month_start = date.today().replace(day=1)
+        next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+
+        total, current_month_total = db.query(
+            func.coalesce(func.sum(DailyPurchases.total_amount), 0),
+            func.coalesce(
+                func.sum(case(
+                    (DailyPurchases.day.between(month_start, next_month_start - timedelta(days=1)), DailyPurchases.total_amount),
+                    else_=0
+                )),
+                0
+            )
+        ).one()
 
-    purchases = db.query(Purchase).all()
+        return {
+            "total": total,
+            "current_month": current_month_total,
+        }
+
+    return _cached(DASHBOARD_PURCHASE_SUMMARY, compute)
 
-    total = sum(p.total_price for p in purchases)
-    current_month_total = sum(
-        p.total_price for p in purchases
-        if p.date.strftime("%m-%Y") == current_month_key
-    )
 
-    return {
-        "total": total,
-        "current_month": current_month_total,
-    }
+@router.get("/cache-stats")
+def get_cache_stats():
+    return dashboard_cache.stats()
 
 @router.get("/recent-logs", response_model=list[ActivityLogSchema])
-def get_recent_logs(db: Session = Depends(get_db)):
-    return db.query(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(4).all()
+@db_endpoint
+def get_recent_logs(db: Session = Depends(get_read_db)):
+    logs = db.query(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(4).all()
+    return list_response(ActivityLogListAdapter, logs)
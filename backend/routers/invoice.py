@@ -1,35 +1,31 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
-from database import get_db
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query, Response
+from database import get_db, db_endpoint, get_read_db
 from auth import get_current_user
 from utils import log_activity
-from sqlalchemy.orm import Session
+from rollups import record_sale
+from app_metrics import INVOICES_CREATED, INVOICE_ITEMS_SOLD, UNITS_SOLD, count
+from cache import dashboard_cache, DASHBOARD_MEDICINE_KEYS, DASHBOARD_MONTHLY_SALES
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import insert
+from stock import adjust_stock_levels
+from allocation import allocate_fefo, take_stock, InsufficientStock
+from collections import defaultdict
 import schemas, models
-from typing import List
-from schemas import InvoiceCreate, InvoiceItemCreate, InvoiceItemResponse, InvoiceResponse
-from models import Customer, Medicine, Invoice, InvoiceItem
+from typing import List, Optional
+from datetime import date
+from pagination import PageParams, paginate
+from serialization import list_response, requested_fields, projection
+from schemas import InvoiceResponse, InvoiceListAdapter
+from models import Invoice, InvoiceItem
 
 router = APIRouter( tags=["Invoice"])
 
-@router.post("/invoice/create")
-def create_invoice(
-    invoice_data: schemas.InvoiceCreate,
-    db: Session = Depends(get_db),
-    user: str = Depends(get_current_user)
-):
-    # Step 1: Validate customer
-    customer = db.query(models.Customer).filter(models.Customer.CUID == invoice_data.CUID).first()
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
+def _save_invoice(db: Session, customer: models.Customer, invoice_data, lines: list[dict], units_by_name: dict) -> models.Invoice:
+    """Write the invoice, its items, the sales rollup, stock levels and the activity log, then commit.
 
-    # Step 2: Validate medicines & stock
-    for item in invoice_data.items:
-        medicine = db.query(models.Medicine).filter(models.Medicine.id == item.medicineId).first()
-        if not medicine:
-            raise HTTPException(status_code=404, detail=f"Medicine ID {item.medicineId} not found")
-        if medicine.quantity < item.quantity:
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for {medicine.name}")
-    
-    # Step 3: Create Invoice
+    Stock must already be taken; ``lines`` are dicts with medicine_id,
+    quantity and unit_price, and ``units_by_name`` the units sold per product name.
+    """
     invoice = models.Invoice(
         CUID=invoice_data.CUID,
         date=invoice_data.date,
@@ -39,63 +35,176 @@ def create_invoice(
     db.add(invoice)
     db.flush()  # Get invoice.id
 
-    # Step 4: Add Invoice Items and update stock
-    for item in invoice_data.items:
-        invoice_item = models.InvoiceItem(
-            invoice_id=invoice.id,
-            medicine_id=item.medicineId,
-            quantity=item.quantity,
-            unit_price=item.unitPrice
-        )
-        db.add(invoice_item)
-
-        # Update medicine stock
-        medicine = db.query(models.Medicine).filter(models.Medicine.id == item.medicineId).first()
-        medicine.quantity -= item.quantity
-        if medicine.quantity <= 0:
-            medicine.quantity = 0
-            medicine.is_active = False
+    # An empty executemany would run INSERT ... DEFAULT VALUES
+    if lines:
+        db.execute(insert(models.InvoiceItem), [
+            {
+                "invoice_id": invoice.id,
+                "medicine_id": line["medicine_id"],
+                "quantity": line["quantity"],
+                "unit_price": line["unit_price"]
+            }
+            for line in lines
+        ])
 
-    db.commit()
+    units = sum(line["quantity"] for line in lines)
+    record_sale(
+        db,
+        day=invoice.date,
+        cuid=invoice.CUID,
+        total_amount=invoice.total_amount,
+        quantity=units
+    )
+    adjust_stock_levels(db, {name: -quantity for name, quantity in units_by_name.items()})
 
     # ✅ Log the activity
     log_activity(
         db=db,
         type="invoice",
-        message=f"Invoice created (ID: {invoice.id}) for customer: {customer.name}, Total: ₹{invoice.total_amount}"
+        message=f"Invoice created (ID: {invoice.id}) for customer: {customer.name}, Total: ₹{invoice.total_amount:.2f}"
     )
 
+    # Invoice, stock, rollup, stock levels and log commit together. Sales do
+    # not bump the medicines version counter: every invoice would queue on
+    # that one row. The list ETag still changes through the updated_at that
+    # take_stock stamps (see conditional.list_etag).
+    db.commit()
+    dashboard_cache.invalidate(*DASHBOARD_MEDICINE_KEYS, DASHBOARD_MONTHLY_SALES)
+    count(INVOICES_CREATED)
+    count(INVOICE_ITEMS_SOLD, len(lines))
+    count(UNITS_SOLD, units)
+    return invoice
+
+
+def _get_customer(db: Session, cuid: int) -> models.Customer:
+    customer = db.query(models.Customer).filter(models.Customer.CUID == cuid).first()
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return customer
+
+
+@router.post("/invoice/create")
+@db_endpoint
+def create_invoice(
+    invoice_data: schemas.InvoiceCreate,
+    db: Session = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    # Step 1: Validate customer
+    customer = _get_customer(db, invoice_data.CUID)
+
+    # Step 2: Validate and decrement stock in one pass. Batches are updated
+    # in id order so concurrent invoices cannot deadlock.
+    requested = defaultdict(int)
+    for item in invoice_data.items:
+        requested[item.medicineId] += item.quantity
+
+    medicines = {
+        medicine.id: medicine
+        for medicine in db.query(
+            models.Medicine.id, models.Medicine.name, models.Medicine.is_active, models.Medicine.expiry_date
+        ).filter(models.Medicine.id.in_(requested))
+    }
+    medicine_names = {medicine_id: medicine.name for medicine_id, medicine in medicines.items()}
+
+    for medicine_id in sorted(requested):
+        if medicine_id not in medicines:
+            raise HTTPException(status_code=404, detail=f"Medicine ID {medicine_id} not found")
+        medicine = medicines[medicine_id]
+        if not medicine.is_active or medicine.expiry_date < date.today():
+            raise HTTPException(status_code=400, detail=f"{medicine.name} (ID {medicine_id}) is archived or expired")
+        if not take_stock(db, medicine_id, requested[medicine_id]):
+            raise HTTPException(status_code=400, detail=f"Insufficient stock for {medicine_names[medicine_id]}")
+
+    units_by_name = defaultdict(int)
+    for medicine_id, quantity in requested.items():
+        units_by_name[medicine_names[medicine_id]] += quantity
+
+    # Step 3: Create the invoice and its items
+    invoice = _save_invoice(db, customer, invoice_data, [
+        {"medicine_id": item.medicineId, "quantity": item.quantity, "unit_price": item.unitPrice}
+        for item in invoice_data.items
+    ], units_by_name)
+
     return {"message": "Invoice created successfully", "invoice_id": invoice.id}
 
 
+@router.post("/invoice/create-fefo")
+@db_endpoint
+def create_invoice_fefo(
+    invoice_data: schemas.InvoiceCreateByName,
+    db: Session = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    """Invoice products by name; each line is drawn from the batches expiring first."""
+    customer = _get_customer(db, invoice_data.CUID)
+
+    requested = defaultdict(int)
+    unit_prices = {}
+    for item in invoice_data.items:
+        requested[item.name] += item.quantity
+        if item.unitPrice is not None:
+            unit_prices[item.name] = item.unitPrice
+
+    try:
+        allocations = allocate_fefo(db, requested)
+    except InsufficientStock as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Without an explicit price each batch sells at its own cost price
+    for allocation in allocations:
+        allocation["unit_price"] = unit_prices.get(allocation["name"], allocation["cost_price"])
+
+    invoice = _save_invoice(db, customer, invoice_data, allocations, requested)
+
+    return {
+        "message": "Invoice created successfully",
+        "invoice_id": invoice.id,
+        "allocations": [
+            {
+                "name": a["name"],
+                "medicineId": a["medicine_id"],
+                "batchNumber": a["batch_number"],
+                "quantity": a["quantity"],
+                "unitPrice": float(a["unit_price"])
+            }
+            for a in allocations
+        ]
+    }
+
+
 
 @router.get("/invoices", response_model=List[InvoiceResponse])
-def get_invoices(db: Session = Depends(get_db), user: str = Depends(get_current_user)):
-    invoices = db.query(Invoice).all()
-    response = []
-
-    for invoice in invoices:
-        customer = db.query(Customer).filter(Customer.CUID == invoice.CUID).first()
-        items = db.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice.id).all()
-        
-        item_data = []
-        for item in items:
-            medicine = db.query(Medicine).filter(Medicine.id == item.medicine_id).first()
-            item_data.append(InvoiceItemResponse(
-                id=item.id,
-                medicine_name=medicine.name if medicine else "Unknown",
-                quantity=item.quantity,
-                unit_price=float(item.unit_price)
-            ))
-
-        response.append(InvoiceResponse(
-            id=invoice.id,
-            CUID=invoice.CUID,
-            customer_name=customer.name if customer else "Unknown",
-            date=invoice.date,
-            discount=float(invoice.discount),
-            total_amount=float(invoice.total_amount),
-            items=item_data
-        ))
-
-    return response
\ No newline at end of file
+@db_endpoint
+def get_invoices(
+    response: Response,
+    customer_id: Optional[int] = Query(None, description="Only invoices for this customer"),
+    start_date: Optional[date] = Query(None, description="Only invoices on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only invoices on or before this date"),
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db),
+    user: str = Depends(get_current_user)
+):
+    selected = projection(fields, InvoiceResponse.model_fields)
+    # Customers are joined in and items are fetched together with their
+    # medicines in a single IN query, so the listing costs two round trips.
+    query = db.query(Invoice).options(
+        joinedload(Invoice.customer),
+        selectinload(Invoice.items).joinedload(InvoiceItem.medicine),
+    )
+    if customer_id:
+        query = query.filter(Invoice.CUID == customer_id)
+    if start_date:
+        query = query.filter(Invoice.date >= start_date)
+    if end_date:
+        query = query.filter(Invoice.date <= end_date)
+
+    invoices = paginate(
+        query, page, response,
+        sorts={"id": (Invoice.id,), "date": (Invoice.date, Invoice.id)},
+        default_sort="id",
+    )
+
+    return list_response(InvoiceListAdapter, invoices, response, selected)
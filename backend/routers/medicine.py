@@ -1,66 +1,165 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query
-from database import get_db
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response
+from database import get_db, db_endpoint, get_read_db
 from auth import get_current_user
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
 import schemas, models
 from utils import log_activity
-from schemas import MedicineOut, MedicineCreate, Medicine
+from rollups import record_purchases
+from app_metrics import MEDICINES_RECEIVED, MEDICINES_ARCHIVED, count
+from cache import dashboard_cache, DASHBOARD_MEDICINE_KEYS, DASHBOARD_PURCHASE_SUMMARY
+from schemas import MedicineOut, MedicineCreate, Medicine, MedicineListItem, MedicineListAdapter
+from collections import defaultdict
 from datetime import date
+from typing import Optional
+from pagination import PageParams, paginate
+from serialization import list_response, requested_fields, projection
+from conditional import bump_versions, not_modified
+from search import medicine_index
+from stock import adjust_stock_levels
 
 router = APIRouter( tags=["Medicine"])
 
+PURCHASE_ID_COUNTER = "purchase_id"
+
+
+def _allocate_purchase_id(db: Session) -> int:
+    # Incrementing the counter row locks it until commit, so concurrent
+    # intakes get distinct P_IDs and a rolled-back intake releases its number.
+    bump = (
+        update(models.Counter)
+        .where(models.Counter.name == PURCHASE_ID_COUNTER)
+        .values(value=models.Counter.value + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(bump).rowcount == 0:
+        # First intake since the counter was introduced: seed it from history
+        last_p_id = db.query(func.coalesce(func.max(models.Purchase.P_ID), 0)).scalar()
+        try:
+            with db.begin_nested():
+                db.add(models.Counter(name=PURCHASE_ID_COUNTER, value=last_p_id + 1))
+        except IntegrityError:
+            db.execute(bump)
+
+    return db.query(models.Counter.value).filter(models.Counter.name == PURCHASE_ID_COUNTER).scalar()
+
+
+def _insert_medicines(db: Session, rows: list[dict]) -> list[int]:
+    """Bulk insert medicine rows and return their ids in input order."""
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(models.Medicine).returning(models.Medicine.id, sort_by_parameter_order=True)
+        return list(db.scalars(stmt, rows))
+
+    # Drivers without batched RETURNING (e.g. MySQL) fall back to a unit-of-work flush
+    db_medicines = [models.Medicine(**row) for row in rows]
+    db.add_all(db_medicines)
+    db.flush()
+    return [m.id for m in db_medicines]
+
+
+def _validate_medicine(med: schemas.MedicineCreate, suppliers: dict):
+    if med.SUID not in suppliers:
+        return f"Supplier with SUID {med.SUID} not found."
+    if med.quantity <= 0:
+        return "Quantity must be greater than zero."
+    if med.costPrice < 0:
+        return "Cost price cannot be negative."
+    return None
+
+
 @router.post("/medicine/create")
+@db_endpoint
 def create_medicines(
     medicines: list[schemas.MedicineCreate],
+    partial: bool = Query(False, description="Insert the valid rows and report the invalid ones instead of rejecting the batch"),
     db: Session = Depends(get_db),
     user: str = Depends(get_current_user)
 ):
     try:
-        # Step 0: Generate a new P_ID (max existing + 1)
-        last_purchase = db.query(models.Purchase).order_by(models.Purchase.P_ID.desc()).first()
-        new_p_id = (last_purchase.P_ID + 1) if last_purchase and last_purchase.P_ID else 1
-
-        for med in medicines:
-            supplier = db.query(models.Supplier).filter(models.Supplier.SUID == med.SUID).first()
-            if not supplier:
-                raise HTTPException(status_code=404, detail=f"Supplier with SUID {med.SUID} not found.")
-
-            db_medicine = models.Medicine(
-                name=med.name,
-                batch_number=med.batchNumber,
-                entry_date=med.entryDate,
-                expiry_date=med.expiryDate,
-                quantity=med.quantity,
-                cost_price=med.costPrice,
-                description=med.description,
-                SUID=med.SUID
-            )
-            db.add(db_medicine)
-            db.flush()
-
-            db_purchase = models.Purchase(
-                P_ID=new_p_id,
-                medicine_id=db_medicine.id,
-                medicine_name=med.name,
-                suid=med.SUID,
-                supplier_name=supplier.name,
-                quantity=med.quantity,
-                unit_price=float(med.costPrice),
-                total_price=float(med.quantity) * float(med.costPrice),
-                date=med.entryDate
-            )
-            db.add(db_purchase)
+        # Step 1: Resolve every referenced supplier in one query
+        suids = {med.SUID for med in medicines}
+        suppliers = dict(
+            db.query(models.Supplier.SUID, models.Supplier.name)
+            .filter(models.Supplier.SUID.in_(suids))
+            .all()
+        )
 
-        db.commit()
+        errors = []
+        valid = []
+        for index, med in enumerate(medicines):
+            error = _validate_medicine(med, suppliers)
+            if error:
+                errors.append({"index": index, "name": med.name, "detail": error})
+            else:
+                valid.append(med)
+
+        if errors and not partial:
+            raise ValueError("; ".join(f"row {e['index']}: {e['detail']}" for e in errors))
+
+        if not valid:
+            return {"message": "No medicines added.", "P_ID": None, "created": 0, "errors": errors}
+
+        # Step 2: Allocate the P_ID and bulk insert medicines, then purchases
+        new_p_id = _allocate_purchase_id(db)
+
+        medicine_ids = _insert_medicines(db, [
+            {
+                "name": med.name,
+                "batch_number": med.batchNumber,
+                "entry_date": med.entryDate,
+                "expiry_date": med.expiryDate,
+                "quantity": med.quantity,
+                "cost_price": med.costPrice,
+                "description": med.description,
+                "SUID": med.SUID,
+                "is_active": True
+            }
+            for med in valid
+        ])
+
+        purchases = [
+            {
+                "P_ID": new_p_id,
+                "medicine_id": medicine_id,
+                "medicine_name": med.name,
+                "suid": med.SUID,
+                "supplier_name": suppliers[med.SUID],
+                "quantity": med.quantity,
+                "unit_price": float(med.costPrice),
+                "total_price": float(med.quantity) * float(med.costPrice),
+                "date": med.entryDate
+            }
+            for med, medicine_id in zip(valid, medicine_ids)
+        ]
+        db.execute(insert(models.Purchase), purchases)
+
+        record_purchases(db, purchases)
+        received = defaultdict(int)
+        for med in valid:
+            received[med.name] += med.quantity
+        adjust_stock_levels(db, received)
 
         # ✅ Log activity
         log_activity(
             db=db,
             type="addition",
-            message=f"{len(medicines)} medicines and purchases added (P_ID: {new_p_id})"
+            message=f"{len(valid)} medicines and purchases added (P_ID: {new_p_id})"
         )
 
-        return {"message": f"{len(medicines)} medicines and purchases added successfully under P_ID {new_p_id}."}
+        bump_versions(db, models.Medicine)
+        db.commit()
+        dashboard_cache.invalidate(*DASHBOARD_MEDICINE_KEYS, DASHBOARD_PURCHASE_SUMMARY)
+        count(MEDICINES_RECEIVED, len(valid))
+        for med, medicine_id in zip(valid, medicine_ids):
+            medicine_index.add(medicine_id, med.name)
+
+        return {
+            "message": f"{len(valid)} medicines and purchases added successfully under P_ID {new_p_id}.",
+            "P_ID": new_p_id,
+            "created": len(valid),
+            "errors": errors
+        }
 
     except Exception as e:
         db.rollback()
@@ -68,19 +167,24 @@ def create_medicines(
 
 
 @router.patch("/medicine/{medicine_id}/archive", response_model=MedicineOut, status_code=200)
+@db_endpoint
 def archive_medicine(
     medicine_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).first()
+    # Locked so the quantity taken off the stock level is the batch's latest
+    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).with_for_update().first()
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
 
+    # Only an active batch still counts towards the product's stock
+    removed = medicine.quantity if medicine.is_active else 0
+
     # Archive the medicine
     medicine.is_active = False
-    db.commit()
-    db.refresh(medicine)
+    db.flush()
+    adjust_stock_levels(db, {medicine.name: -removed})
 
     # Log the archiving action
     log_activity(
@@ -89,48 +193,101 @@ def archive_medicine(
         message=f"Medicine Archived: {medicine.name} (ID: {medicine.id})"
     )
 
+    bump_versions(db, models.Medicine)
+    db.commit()
+    db.refresh(medicine)
+    dashboard_cache.invalidate(*DASHBOARD_MEDICINE_KEYS)
+    count(MEDICINES_ARCHIVED.labels("manual"))
+    medicine_index.remove(medicine.id)
+
     # Return the updated medicine with the archived field
     return MedicineOut.from_orm_with_archived(medicine)
 
 
-@router.get("/medicines")
+# Sort keys of the /medicines listing
+MEDICINE_SORTS = {
+    "id": (Medicine.id,),
+    "name": (Medicine.name, Medicine.id),
+    "expiry_date": (Medicine.expiry_date, Medicine.id),
+}
+
+
+def medicine_list_query(db: Session, include_inactive: bool = False, name: Optional[str] = None, suid: Optional[int] = None):
+    """The /medicines query, filtered but not yet sorted or paged."""
+    query = db.query(Medicine).options(joinedload(Medicine.supplier))
+
+    # Filter if not including inactive. Expired batches are archived by the
+    # expiry sweeper (tasks.py); the date check hides any that expired since
+    # the last sweep.
+    if not include_inactive:
+        query = query.filter(Medicine.is_active == True, Medicine.expiry_date >= date.today())
+    if name:
+        query = query.filter(Medicine.name.ilike(f"%{name}%"))
+    if suid:
+        query = query.filter(Medicine.SUID == suid)
+    return query
+
+
+@router.get("/medicines", response_model=list[MedicineListItem])
+@db_endpoint
 def get_medicines(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     user: str = Depends(get_current_user),
-    include_inactive: bool = Query(False, description="Include inactive medicines")
+    include_inactive: bool = Query(False, description="Include inactive medicines"),
+    name: Optional[str] = Query(None, description="Filter by name (case-insensitive substring)"),
+    suid: Optional[int] = Query(None, description="Only medicines from this supplier"),
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(requested_fields)
 ):
-    today = date.today()
+    selected = projection(fields, MedicineListItem.model_fields)
+    query = medicine_list_query(db, include_inactive, name, suid)
 
-    # First fetch all medicines
-    medicines = db.query(Medicine).all()
+    # Rows embed their supplier's name, so supplier edits count as changes
+    cached = not_modified(request, response, query, models.Medicine, models.Supplier)
+    if cached:
+        return cached
 
-    # Update expired medicines to inactive
-    updated = False
-    for med in medicines:
-        if med.expiry_date and med.expiry_date < today and med.is_active:
-            med.is_active = False
-            updated = True
+    medicines = paginate(
+        query, page, response,
+        sorts=MEDICINE_SORTS,
+        default_sort="id",
+    )
 
-    if updated:
-        db.commit()
+    return list_response(MedicineListAdapter, medicines, response, selected)
+
+
+# Not a db_endpoint: rebuilding the name index would block the event loop in DB_ASYNC mode
+@router.get("/medicines/search", response_model=list[MedicineListItem])
+def search_medicines(
+    q: str = Query(..., min_length=1, description="Name prefix or approximate name"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of batches"),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db),
+    user: str = Depends(get_current_user)
+):
+    selected = projection(fields, MedicineListItem.model_fields)
+    medicine_index.ensure_fresh(db)
+    # The index only knows names; stock and expiry are checked in the database
+    # so results stay exact even when the index lags other workers.
+    ranked = medicine_index.search(q, limit * 2)
+    if not ranked:
+        return []
+
+    rank = {medicine_id: i for i, ids in enumerate(ranked) for medicine_id in ids}
+    medicines = (
+        db.query(Medicine)
+        .options(joinedload(Medicine.supplier))
+        .filter(
+            Medicine.id.in_(rank),
+            Medicine.is_active == True,
+            Medicine.quantity > 0,
+            Medicine.expiry_date >= date.today()
+        )
+        .all()
+    )
+    # Best name first; within a name, the batch expiring soonest
+    medicines.sort(key=lambda m: (rank[m.id], m.expiry_date, m.id))
+    return list_response(MedicineListAdapter, medicines[:limit], fields=selected)
 
-    # Filter if not including inactive
-    if not include_inactive:
-        medicines = [m for m in medicines if m.is_active]
-
-    return [
-        {
-            "id": m.id,
-            "name": m.name,
-            "batch_number": m.batch_number,
-            "entry_date": m.entry_date,
-            "expiry_date": m.expiry_date,
-            "quantity": m.quantity,
-            "cost_price": float(m.cost_price),
-            "description": m.description,
-            "SUID": m.SUID,
-            "supplier_name": m.supplier.name if m.supplier else None,
-            "is_active": m.is_active
-        }
-        for m in medicines
-    ]
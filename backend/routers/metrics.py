@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Response
+import database
+from app_metrics import render
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("")
+def get_metrics():
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    pools = {"primary": database.pool_status(database.engine.pool)}
+    if database.async_engine is not None:
+        pools["async"] = database.pool_status(database.async_engine.sync_engine.pool)
+    if database.read_engine is not database.engine:
+        pools["replica"] = database.pool_status(database.read_engine.pool)
+    if database.async_read_engine is not database.async_engine:
+        pools["async_replica"] = database.pool_status(database.async_read_engine.sync_engine.pool)
+    return pools
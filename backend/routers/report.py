@@ -1,75 +1,203 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime, date
+from decimal import Decimal
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from auth import get_current_user
-from database import get_db
-from models import Purchase, Invoice, Customer, Medicine, InvoiceItem
-import models, schemas
+from database import get_read_db, read_session_factory
+import csv
+import io
+import json
+from models import Purchase, Invoice, Customer, Medicine, InvoiceItem, DailySales, DailyPurchases
+from serialization import json_response, requested_fields, projection, project_rows
 
 
 router = APIRouter( tags=["Report"])
 
+# Rows fetched per server-side cursor round trip, and rows per streamed chunk
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Per-purchase and per-invoice keys selectable with fields=
+PURCHASE_REPORT_FIELDS = (
+    "purchase_id", "date", "suid", "supplier_name", "item_count", "total_amount", "total_quantity", "items"
+)
+SALES_REPORT_FIELDS = (
+    "id", "date", "CUID", "customer_name", "customer_address", "discount", "total_amount",
+    "amount_before_discount", "items"
+)
+
+
+# Report queries, shared with bench/explain_queries.py so the plans it checks
+# are the ones these endpoints run. The report endpoints are plain sync
+# handlers, not db_endpoints: building and serializing a large report would
+# otherwise hold the event loop in DB_ASYNC mode.
+def purchase_filters(start_date, end_date, suid=None) -> list:
+    filters = [Purchase.date >= start_date, Purchase.date <= end_date]
+    if suid:
+        filters.append(Purchase.suid == suid)
+    return filters
+
+
+def purchase_groups_query(db: Session, filters):
+    """One row per purchase (P_ID) with its totals, newest first."""
+    latest_date = func.max(Purchase.date).label("date")
+    return (
+        db.query(
+            Purchase.P_ID,
+            latest_date,
+            func.min(Purchase.suid).label("suid"),
+            func.min(Purchase.supplier_name).label("supplier_name"),
+            func.count(Purchase.id).label("item_count"),
+            func.sum(Purchase.total_price).label("total_amount"),
+            func.sum(Purchase.quantity).label("total_quantity")
+        )
+        .filter(*filters)
+        .group_by(Purchase.P_ID)
+        .order_by(latest_date.desc(), Purchase.P_ID.desc())
+    )
+
+
+def purchase_items_query(db: Session, filters):
+    return (
+        db.query(
+            Purchase.P_ID,
+            Purchase.medicine_name,
+            Purchase.supplier_name,
+            Purchase.quantity,
+            Purchase.unit_price,
+            Purchase.total_price
+        )
+        .filter(*filters)
+        .order_by(Purchase.date.desc(), Purchase.P_ID.desc(), Purchase.id)
+    )
+
+
+def sales_filters(start_date, end_date, customer_id=None) -> list:
+    filters = [Invoice.date.between(start_date, end_date)]
+    if customer_id:
+        filters.append(Invoice.CUID == customer_id)
+    return filters
+
+
+def sales_invoices_query(db: Session, filters):
+    """Invoices in range with their customer and pre-discount item total, newest first."""
+    # Per-invoice item totals, restricted to the invoices in range
+    subtotals = (
+        db.query(
+            InvoiceItem.invoice_id.label("invoice_id"),
+            func.sum(InvoiceItem.unit_price * InvoiceItem.quantity).label("amount_before_discount"),
+            func.sum(InvoiceItem.quantity).label("quantity")
+        )
+        .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+        .filter(*filters)
+        .group_by(InvoiceItem.invoice_id)
+        .subquery()
+    )
+    return (
+        db.query(
+            Invoice.id,
+            Invoice.date,
+            Invoice.CUID,
+            Customer.name.label("customer_name"),
+            Customer.address.label("customer_address"),
+            Invoice.discount,
+            Invoice.total_amount,
+            func.coalesce(subtotals.c.amount_before_discount, 0).label("amount_before_discount")
+        )
+        .join(Customer, Customer.CUID == Invoice.CUID)
+        .outerjoin(subtotals, subtotals.c.invoice_id == Invoice.id)
+        .filter(*filters)
+        .order_by(Invoice.date.desc(), Invoice.id.desc())
+    )
+
+
+def sales_items_query(db: Session, filters):
+    return (
+        db.query(
+            InvoiceItem.invoice_id,
+            Medicine.name.label("medicine_name"),
+            InvoiceItem.quantity,
+            InvoiceItem.unit_price
+        )
+        .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+        .join(Medicine, Medicine.id == InvoiceItem.medicine_id)
+        .filter(*filters)
+        .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+    )
+
 
 @router.get("/purchase-report")
 def get_purchase_report(
     start_date: str = Query(...),
     end_date: str = Query(...),
     suid: int = Query(None),
-    db: Session = Depends(get_db),
+    summary_only: bool = Query(False, description="Return totals and per-purchase subtotals without line items"),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db),
     user: str = Depends(get_current_user)
 ):
+    selected = projection(fields, PURCHASE_REPORT_FIELDS)
+    # Leaving out items skips the line item query, like summary_only
+    summary_only = summary_only or (selected is not None and "items" not in selected)
     try:
         start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
         end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-        # Query the Purchase table, not a variable called "purchases"
-        query = db.query(Purchase).filter(
-            Purchase.date >= start_dt,
-            Purchase.date <= end_dt
-        )
+        filters = purchase_filters(start_dt, end_dt, suid)
 
+        rollup_filters = [DailyPurchases.day >= start_dt, DailyPurchases.day <= end_dt]
         if suid:
-            query = query.filter(Purchase.suid == suid)
+            rollup_filters.append(DailyPurchases.suid == suid)
 
-        purchase_entries = query.order_by(Purchase.date.desc(), Purchase.P_ID.desc()).all()
-
-        grouped = {}
-        total_qty = 0
-        total_amount = 0.0
-
-        for p in purchase_entries:
-            pid = p.P_ID
-            if pid not in grouped:
-                grouped[pid] = {
-                    "purchase_id": pid,
-                    "date": p.date.strftime("%Y-%m-%d"),
-                    "suid": p.suid,  # Add this
-                    "supplier_name": p.supplier_name, 
-                    "items": [],
-                    "total_amount": 0.0,
-                    "total_quantity": 0
-                }
-
-            item = {
-                "medicine_name": p.medicine_name,
-                "supplier_name": p.supplier_name,
-                "quantity": p.quantity,
-                "unit_price": float(p.unit_price),
-                "total_cost": float(p.total_price)
-            }
+        total_qty, total_amount = (
+            db.query(
+                func.coalesce(func.sum(DailyPurchases.quantity), 0),
+                func.coalesce(func.sum(DailyPurchases.total_amount), 0)
+            )
+            .filter(*rollup_filters)
+            .one()
+        )
 
-            grouped[pid]["items"].append(item)
-            grouped[pid]["total_amount"] += item["total_cost"]
-            grouped[pid]["total_quantity"] += item["quantity"]
-            total_qty += item["quantity"]
-            total_amount += item["total_cost"]
+        groups = purchase_groups_query(db, filters).all()
 
-        return {
-            "total_quantity": total_qty,
-            "total_amount": round(total_amount, 2),
-            "data": list(grouped.values())
+        grouped = {
+            g.P_ID: {
+                "purchase_id": g.P_ID,
+                "date": g.date.strftime("%Y-%m-%d"),
+                "suid": g.suid,
+                "supplier_name": g.supplier_name,
+                "item_count": g.item_count,
+                "total_amount": float(g.total_amount or 0),
+                "total_quantity": int(g.total_quantity or 0)
+            }
+            for g in groups
         }
 
+        if not summary_only:
+            for group in grouped.values():
+                group["items"] = []
+
+            line_items = purchase_items_query(db, filters).all()
+            for p in line_items:
+                grouped[p.P_ID]["items"].append({
+                    "medicine_name": p.medicine_name,
+                    "supplier_name": p.supplier_name,
+                    "quantity": p.quantity,
+                    "unit_price": p.unit_price,
+                    "total_cost": p.total_price
+                })
+
+        # Serialized straight to JSON; there is no response model to validate against
+        return json_response({
+            "total_quantity": int(total_qty),
+            "total_amount": round(float(total_amount), 2),
+            "data": project_rows(list(grouped.values()), selected)
+        })
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -79,53 +207,172 @@ def get_sales_report(
     start_date: date = Query(...),
     end_date: date = Query(...),
     customer_id: int = None,
-    db: Session = Depends(get_db)
+    summary_only: bool = Query(False, description="Return totals and per-invoice subtotals without line items"),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(Invoice).filter(Invoice.date.between(start_date, end_date))
+    selected = projection(fields, SALES_REPORT_FIELDS)
+    summary_only = summary_only or (selected is not None and "items" not in selected)
+    filters = sales_filters(start_date, end_date, customer_id)
 
+    rollup_filters = [DailySales.day.between(start_date, end_date)]
     if customer_id:
-        query = query.filter(Invoice.CUID == customer_id)
+        rollup_filters.append(DailySales.CUID == customer_id)
 
-    invoices = query.order_by(Invoice.date.desc(), Invoice.id.desc()).all()
+    total_amount, total_quantity = (
+        db.query(
+            func.coalesce(func.sum(DailySales.total_amount), 0),
+            func.coalesce(func.sum(DailySales.quantity), 0)
+        )
+        .filter(*rollup_filters)
+        .one()
+    )
 
-    report = []
-    total_amount = 0.0
-    total_quantity = 0
+    invoices = sales_invoices_query(db, filters).all()
 
-    for invoice in invoices:
-        customer = db.query(Customer).filter(Customer.CUID == invoice.CUID).first()
-        items = db.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice.id).all()
+    report = {
+        inv.id: {
+            "id": inv.id,
+            "date": inv.date,
+            "CUID": inv.CUID,
+            "customer_name": inv.customer_name,
+            "customer_address": inv.customer_address,
+            "discount": inv.discount,
+            "total_amount": inv.total_amount,
+            "amount_before_discount": round(float(inv.amount_before_discount), 2)
+        }
+        for inv in invoices
+    }
 
-        item_list = []
-        amount_before_discount = 0.0
+    if not summary_only:
+        for invoice in report.values():
+            invoice["items"] = []
 
+        items = sales_items_query(db, filters).all()
         for item in items:
-            medicine = db.query(Medicine).filter(Medicine.id == item.medicine_id).first()
-            subtotal = float(item.unit_price) * item.quantity
-            amount_before_discount += subtotal
-            total_quantity += item.quantity  # ⬅️ accumulate quantity
-            item_list.append({
-                "medicine_name": medicine.name,
+            report[item.invoice_id]["items"].append({
+                "medicine_name": item.medicine_name,
                 "quantity": item.quantity,
-                "unit_price": float(item.unit_price),
+                "unit_price": item.unit_price,
             })
 
-        total_amount += float(invoice.total_amount)  # ⬅️ accumulate amount
-
-        report.append({
-            "id": invoice.id,
-            "date": invoice.date,
-            "CUID": invoice.CUID,
-            "customer_name": customer.name,
-            "customer_address": customer.address,
-            "discount": float(invoice.discount),
-            "total_amount": float(invoice.total_amount),
-            "amount_before_discount": round(amount_before_discount, 2),
-            "items": item_list
-        })
+    return json_response({
+        "invoices": project_rows(list(report.values()), selected),
+        "total_amount": round(float(total_amount), 2),
+        "total_quantity": int(total_quantity)
+    })
+
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _stream_export(build_query, columns, fmt, session_factory):
+    # The export opens its own session: the request-scoped one from get_db is
+    # closed before the response body is streamed.
+    def encode(rows):
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            return buffer.getvalue()
+        return "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    # Send the CSV header before the query runs so the first byte goes out
+    # immediately, even for very large ranges.
+    if fmt == "csv":
+        yield encode([columns])
+
+    db = session_factory()
+    try:
+        chunk = []
+        for row in build_query(db).yield_per(EXPORT_BATCH_SIZE):
+            chunk.append([_export_value(v) for v in row])
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield encode(chunk)
+                chunk = []
+        if chunk:
+            yield encode(chunk)
+    finally:
+        db.close()
+
+
+def _export_response(request, build_query, columns, fmt, name):
+    return StreamingResponse(
+        _stream_export(build_query, columns, fmt, read_session_factory(request)),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@router.get("/purchase-report/export")
+def export_purchase_report(
+    request: Request,
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    suid: int = Query(None),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user: str = Depends(get_current_user)
+):
+    columns = ["purchase_id", "date", "suid", "supplier_name", "medicine_name", "quantity", "unit_price", "total_cost"]
+
+    def build_query(db):
+        query = db.query(
+            Purchase.P_ID,
+            Purchase.date,
+            Purchase.suid,
+            Purchase.supplier_name,
+            Purchase.medicine_name,
+            Purchase.quantity,
+            Purchase.unit_price,
+            Purchase.total_price
+        ).filter(Purchase.date >= start_date, Purchase.date <= end_date)
+        if suid:
+            query = query.filter(Purchase.suid == suid)
+        return query.order_by(Purchase.date.desc(), Purchase.P_ID.desc(), Purchase.id)
+
+    return _export_response(request, build_query, columns, format, f"purchase-report-{start_date}-{end_date}")
+
+
+@router.get("/sales-report/export")
+def export_sales_report(
+    request: Request,
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    customer_id: int = None,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user: str = Depends(get_current_user)
+):
+    columns = [
+        "invoice_id", "date", "CUID", "customer_name", "discount", "invoice_total",
+        "medicine_name", "quantity", "unit_price"
+    ]
+
+    def build_query(db):
+        query = (
+            db.query(
+                Invoice.id,
+                Invoice.date,
+                Invoice.CUID,
+                Customer.name,
+                Invoice.discount,
+                Invoice.total_amount,
+                Medicine.name,
+                InvoiceItem.quantity,
+                InvoiceItem.unit_price
+            )
+            .join(Customer, Customer.CUID == Invoice.CUID)
+            .join(InvoiceItem, InvoiceItem.invoice_id == Invoice.id)
+            .join(Medicine, Medicine.id == InvoiceItem.medicine_id)
+            .filter(Invoice.date.between(start_date, end_date))
+        )
+        if customer_id:
+            query = query.filter(Invoice.CUID == customer_id)
+        return query.order_by(Invoice.date.desc(), Invoice.id.desc(), InvoiceItem.id)
 
-    return {
-        "invoices": report,
-        "total_amount": round(total_amount, 2),
-        "total_quantity": total_quantity
-    }
\ No newline at end of file
+    return _export_response(request, build_query, columns, format, f"sales-report-{start_date}-{end_date}")
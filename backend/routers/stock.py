@@ -0,0 +1,65 @@
+from fastapi import Depends, HTTPException, APIRouter, Query, Response
+from schemas import StockLevelOut, StockThresholdsUpdate, StockLevelListAdapter
+from models import StockLevel
+from typing import List, Optional
+from database import get_db, db_endpoint, get_read_db
+from auth import get_current_user
+from sqlalchemy.orm import Session
+from utils import log_activity
+from pagination import PageParams, paginate
+from serialization import list_response, requested_fields, projection
+from stock import stock_level_row
+
+router = APIRouter(tags=["Stock"])
+
+
+@router.get("/stock-levels", response_model=List[StockLevelOut])
+@db_endpoint
+def get_stock_levels(
+    response: Response,
+    low_only: bool = Query(False, description="Only products at or below their low-stock threshold"),
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db),
+    user: str = Depends(get_current_user)
+):
+    selected = projection(fields, StockLevelOut.model_fields)
+    query = db.query(StockLevel)
+    if low_only:
+        query = query.filter(StockLevel.is_low == True)
+
+    levels = paginate(
+        query, page, response,
+        sorts={"name": (StockLevel.name,), "quantity": (StockLevel.total_quantity, StockLevel.name)},
+        default_sort="name",
+    )
+    return list_response(StockLevelListAdapter, levels, response, selected)
+
+
+@router.patch("/stock-levels/{name}", response_model=StockLevelOut)
+@db_endpoint
+def update_stock_thresholds(
+    name: str,
+    thresholds: StockThresholdsUpdate,
+    db: Session = Depends(get_db),
+    user: str = Depends(get_current_user)
+):
+    level = db.query(StockLevel).filter(StockLevel.name == name).with_for_update().first()
+    if not level:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    low = level.low_stock_threshold if thresholds.low_stock_threshold is None else thresholds.low_stock_threshold
+    days = level.near_expiry_days if thresholds.near_expiry_days is None else thresholds.near_expiry_days
+    row = stock_level_row(level.name, level.total_quantity, level.batch_count, level.earliest_expiry, low, days)
+    for column, value in row.items():
+        setattr(level, column, value)
+
+    log_activity(
+        db=db,
+        type="edit",
+        message=f"Stock thresholds for {level.name}: low stock {low}, near expiry {days} days"
+    )
+
+    db.commit()
+    db.refresh(level)
+    return level
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 import models, schemas
 from models import Supplier
-from schemas import SupplierResponse, SupplierCreate, SupplierUpdate
-from database import get_db
+from schemas import SupplierResponse, SupplierCreate, SupplierUpdate, SupplierListAdapter
+from database import get_db, db_endpoint, get_read_db
 from auth import get_current_user
 from utils import log_activity
-from typing import List
+from typing import List, Optional
+from pagination import PageParams, paginate
+from serialization import list_response, requested_fields, projection
+from conditional import bump_versions, not_modified
+from cache import dashboard_cache, DASHBOARD_TOTALS
 
 router = APIRouter(tags=["Supplier"])
 
 @router.post("/supplier/create")
+@db_endpoint
 def create_supplier(
     supplier: schemas.SupplierCreate,
     db: Session = Depends(get_db),
@@ -24,8 +29,7 @@ def create_supplier(
     )
     try:
         db.add(db_supplier)
-        db.commit()
-        db.refresh(db_supplier)
+        db.flush()  # Get db_supplier.SUID
 
         # Log the addition
         log_activity(
@@ -34,6 +38,10 @@ def create_supplier(
             message=f"Supplier added: {db_supplier.name} (SUID: {db_supplier.SUID})"
         )
 
+        bump_versions(db, models.Supplier)
+        db.commit()
+        dashboard_cache.invalidate(DASHBOARD_TOTALS)
+
         return {"message": "Supplier added successfully", "SUID": db_supplier.SUID}
     except Exception as e:
         db.rollback()
@@ -42,10 +50,34 @@ def create_supplier(
 
     
 @router.get("/suppliers", response_model=List[SupplierResponse])
-def get_suppliers(db: Session = Depends(get_db), user: str = Depends(get_current_user)):
-    return db.query(Supplier).all()
+@db_endpoint
+def get_suppliers(
+    request: Request,
+    response: Response,
+    name: Optional[str] = Query(None, description="Filter by name (case-insensitive substring)"),
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(requested_fields),
+    db: Session = Depends(get_read_db),
+    user: str = Depends(get_current_user)
+):
+    selected = projection(fields, SupplierResponse.model_fields)
+    query = db.query(Supplier)
+    if name:
+        query = query.filter(Supplier.name.ilike(f"%{name}%"))
+
+    cached = not_modified(request, response, query, Supplier)
+    if cached:
+        return cached
+
+    suppliers = paginate(
+        query, page, response,
+        sorts={"id": (Supplier.SUID,), "name": (Supplier.name, Supplier.SUID)},
+        default_sort="id",
+    )
+    return list_response(SupplierListAdapter, suppliers, response, selected)
 
 @router.put("/supplier/update/{suid}")
+@db_endpoint
 def update_supplier(suid: int, updated: SupplierUpdate, db: Session = Depends(get_db)):
     supplier = db.query(Supplier).filter(Supplier.SUID == suid).first()
     if not supplier:
@@ -56,9 +88,6 @@ def update_supplier(suid: int, updated: SupplierUpdate, db: Session = Depends(ge
     supplier.phone = updated.phone
     supplier.email = updated.email
 
-    db.commit()
-    db.refresh(supplier)
-
     # Log the update
     log_activity(
         db=db,
@@ -66,5 +95,9 @@ def update_supplier(suid: int, updated: SupplierUpdate, db: Session = Depends(ge
         message=f"Supplier updated: {supplier.name} (SUID: {supplier.SUID})"
     )
 
+    bump_versions(db, Supplier)
+    db.commit()
+    db.refresh(supplier)
+
     return supplier
 
@@ -0,0 +1,110 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from auth import get_current_user
+from database import get_read_db
+from models import Customer, Medicine, Supplier
+from pagination import decode_cursor, encode_cursor, keyset_after
+from serialization import json_response
+
+load_dotenv()
+
+router = APIRouter(tags=["Sync"])
+
+# A write stamps updated_at before it commits, so a slow transaction (or one
+# not yet replicated) can become visible with a stamp below a watermark
+# already handed out. Watermarks therefore never pass now minus this many
+# seconds; rows changed within the window are sent again on the next sync,
+# which clients apply as idempotent upserts. Keep it above REPLICA_MAX_LAG_SECONDS.
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", 30))
+MAX_SYNC_BATCH = 5000
+
+WATERMARK_SORT = "sync"
+
+# Per table: the columns sent, the (updated_at, primary key) keyset served by
+# the ix_*_updated_at_id indexes, and the flag marking archived rows, if any
+SYNC_TABLES = {
+    "medicines": (
+        [Medicine.id, Medicine.name, Medicine.batch_number, Medicine.entry_date, Medicine.expiry_date,
+         Medicine.quantity, Medicine.cost_price, Medicine.description, Medicine.SUID],
+        (Medicine.updated_at, Medicine.id),
+        Medicine.is_active,
+    ),
+    "customers": (
+        [Customer.CUID, Customer.name, Customer.phone, Customer.email, Customer.address],
+        (Customer.updated_at, Customer.CUID),
+        None,
+    ),
+    "suppliers": (
+        [Supplier.SUID, Supplier.name, Supplier.phone, Supplier.email, Supplier.address],
+        (Supplier.updated_at, Supplier.SUID),
+        None,
+    ),
+}
+WATERMARK_COLUMNS = [column for _, key, _ in SYNC_TABLES.values() for column in key]
+
+
+def _changes(db: Session, fields, key, active, position, cutoff, limit) -> tuple[dict, tuple, bool]:
+    """One table's changes after ``position``, oldest first, its next position, and whether more remain."""
+    query = select(*fields, *key, *([active] if active is not None else []))
+    if position[0] is not None:
+        query = query.where(keyset_after(key, position, False))
+    rows = db.execute(query.order_by(*key).limit(limit + 1)).all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    n = len(fields)
+    last = tuple(rows[-1][n:n + 2]) if rows else position
+    if not more and last[0] is not None:
+        # Caught up: hold the watermark back to the overlap window
+        last = min(last, (cutoff, 0))
+
+    changes = {"columns": [column.key for column in fields]}
+    if active is None:
+        changes["rows"] = [row[:n] for row in rows]
+    else:
+        changes["rows"] = [row[:n] for row in rows if row[-1]]
+        changes["archived"] = [row[0] for row in rows if not row[-1]]
+    return changes, last, more
+
+
+# Not a db_endpoint: batches of up to MAX_SYNC_BATCH rows per table are
+# serialized in the threadpool rather than on the event loop in DB_ASYNC mode
+@router.get("/sync")
+def sync(
+    since: Optional[str] = Query(None, description="Watermark from the previous sync; omit for a full copy"),
+    limit: int = Query(1000, ge=1, le=MAX_SYNC_BATCH, description="Maximum rows per table in this batch"),
+    db: Session = Depends(get_read_db),
+    user: str = Depends(get_current_user)
+):
+    """Medicines, customers and suppliers created, updated or archived since ``since``.
+
+    Rows are sent as arrays in ``columns`` order. Archived medicine batches
+    come as ids under ``archived`` for the client to drop; batches past their
+    expiry date stay in ``rows`` until the expiry sweep archives them, so
+    clients should still check expiry_date. Pass the returned
+    ``watermark`` as ``since`` next time; while ``has_more`` is true, call
+    again straight away.
+    """
+    if since:
+        positions = decode_cursor(since, WATERMARK_SORT, WATERMARK_COLUMNS)
+    else:
+        positions = [None] * len(WATERMARK_COLUMNS)
+    cutoff = datetime.utcnow() - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+
+    payload = {}
+    watermark = []
+    has_more = False
+    for i, (table, (fields, key, active)) in enumerate(SYNC_TABLES.items()):
+        position = tuple(positions[2 * i:2 * i + 2])
+        payload[table], position, more = _changes(db, fields, key, active, position, cutoff, limit)
+        watermark.extend(position)
+        has_more = has_more or more
+
+    return json_response({"watermark": encode_cursor(WATERMARK_SORT, watermark), "has_more": has_more, **payload})
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, AliasPath, TypeAdapter
 from datetime import date
 from typing import Optional, List
 from models import Medicine  # or wherever your Medicine model is defined
@@ -23,11 +23,10 @@ class SupplierResponse(BaseModel):
     SUID: int
     name: str
     phone: str
-    email: EmailStr
+    email: str  # validated on input; re-validating on every read is costly
     address: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SupplierUpdate(BaseModel):
     name: Optional[str] = None
@@ -46,11 +45,10 @@ class CustomerResponse(BaseModel):
     CUID: int
     name: str
     phone: str
-    email: EmailStr
+    email: str  # validated on input; re-validating on every read is costly
     address: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class CustomerUpdate(BaseModel):
     name: Optional[str] = None
@@ -94,41 +92,95 @@ class MedicineOut(BaseModel):
         
         return base
 
+class MedicineListItem(BaseModel):
+    id: int
+    name: str
+    batch_number: str
+    entry_date: date
+    expiry_date: date
+    quantity: int
+    cost_price: float
+    description: Optional[str] = None
+    SUID: int
+    supplier_name: Optional[str] = Field(None, validation_alias=AliasPath("supplier", "name"))
+    is_active: Optional[bool] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 class InvoiceItemCreate(BaseModel):
     medicineId: int
-    quantity: int
+    quantity: int = Field(gt=0)
     unitPrice: float
 
 class InvoiceCreate(BaseModel):
     CUID: int
     date: date
     discount: float
-    items: List[InvoiceItemCreate]
+    items: List[InvoiceItemCreate] = Field(min_length=1)
     finalTotal: float
 
+class InvoiceItemByName(BaseModel):
+    name: str
+    quantity: int = Field(gt=0)
+    unitPrice: Optional[float] = None  # defaults to each batch's cost price
+
+class InvoiceCreateByName(BaseModel):
+    CUID: int
+    date: date
+    discount: float
+    items: List[InvoiceItemByName] = Field(min_length=1)
+    finalTotal: float
+
+# Stock alerts are read from StockLevel rows
+class LowStockAlert(BaseModel):
+    name: str
+    quantity: int = Field(validation_alias="total_quantity")
+    threshold: int = Field(validation_alias="low_stock_threshold")
+    batch_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class NearExpiryAlert(BaseModel):
+    name: str
+    expiry_date: date = Field(validation_alias="earliest_expiry")
+    quantity: int = Field(validation_alias="total_quantity")
+    near_expiry_days: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class StockLevelOut(BaseModel):
+    name: str
+    total_quantity: int
+    batch_count: int
+    earliest_expiry: Optional[date] = None
+    low_stock_threshold: int
+    near_expiry_days: int
+    is_low: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+class StockThresholdsUpdate(BaseModel):
+    low_stock_threshold: Optional[int] = Field(None, ge=0)  # 0 disables the low-stock alert
+    near_expiry_days: Optional[int] = Field(None, ge=0)
+
 class InvoiceItemResponse(BaseModel):
     id: int
-    medicine_name: str
+    medicine_name: str = Field("Unknown", validation_alias=AliasPath("medicine", "name"))
     quantity: int
     unit_price: float
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class InvoiceResponse(BaseModel):
     id: int
     CUID: int
-    customer_name: str
+    customer_name: str = Field("Unknown", validation_alias=AliasPath("customer", "name"))
     date: date
     discount: float
     total_amount: float
     items: List[InvoiceItemResponse]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ActivityLogSchema(BaseModel):
     id: int
@@ -136,5 +188,16 @@ class ActivityLogSchema(BaseModel):
     message: str
     timestamp: datetime
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Built once at import: validating and dumping a list through a TypeAdapter
+# skips FastAPI's per-request response_model field setup and encoder pass.
+SupplierListAdapter = TypeAdapter(List[SupplierResponse])
+CustomerListAdapter = TypeAdapter(List[CustomerResponse])
+MedicineListAdapter = TypeAdapter(List[MedicineListItem])
+InvoiceListAdapter = TypeAdapter(List[InvoiceResponse])
+ActivityLogListAdapter = TypeAdapter(List[ActivityLogSchema])
+StockLevelListAdapter = TypeAdapter(List[StockLevelOut])
+LowStockAlertListAdapter = TypeAdapter(List[LowStockAlert])
+NearExpiryAlertListAdapter = TypeAdapter(List[NearExpiryAlert])
@@ -0,0 +1,165 @@
+import bisect
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from models import Medicine
+
+load_dotenv()
+
+# Each worker keeps its own index. Changes made in this process are applied
+# immediately; the index is rebuilt from the database after this many seconds
+# to pick up changes made by other workers.
+SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", 60))
+# Minimum trigram similarity for a typo-tolerant match
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", 0.3))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    return " ".join(_WORD.findall(name.lower()))
+
+
+def trigrams(text: str) -> set:
+    # Padded like pg_trgm so short words and word starts still produce grams
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """In-memory prefix and trigram index over active medicine names.
+
+    Names are indexed once however many batches share them; a lookup returns
+    medicine ids ranked by name, which the caller re-checks against the
+    database for stock and expiry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = defaultdict(set)  # normalized name -> medicine ids
+        self._words = []  # sorted (word, normalized name) for prefix lookups
+        self._grams = defaultdict(set)  # trigram -> normalized names
+        self._name_grams = {}  # normalized name -> its trigrams
+        self._names_by_id = {}
+        self.built_at = None
+
+    def _add_name(self, name):
+        for word in set(name.split()):
+            bisect.insort(self._words, (word, name))
+        grams = trigrams(name)
+        self._name_grams[name] = grams
+        for gram in grams:
+            self._grams[gram].add(name)
+
+    def _remove_name(self, name):
+        for word in set(name.split()):
+            i = bisect.bisect_left(self._words, (word, name))
+            if i < len(self._words) and self._words[i] == (word, name):
+                del self._words[i]
+        for gram in self._name_grams.pop(name, ()):
+            self._grams[gram].discard(name)
+
+    def add(self, medicine_id: int, name: str):
+        name = normalize(name)
+        with self._lock:
+            if not self._ids[name]:
+                self._add_name(name)
+            self._ids[name].add(medicine_id)
+            self._names_by_id[medicine_id] = name
+
+    def remove(self, *medicine_ids: int):
+        with self._lock:
+            for medicine_id in medicine_ids:
+                name = self._names_by_id.pop(medicine_id, None)
+                if name is None:
+                    continue
+                self._ids[name].discard(medicine_id)
+                if not self._ids[name]:
+                    del self._ids[name]
+                    self._remove_name(name)
+
+    def rebuild(self, db):
+        rows = db.execute(select(Medicine.id, Medicine.name).where(Medicine.is_active == True)).all()
+        fresh = NameIndex()
+        for medicine_id, name in rows:
+            name = normalize(name)
+            if not fresh._ids[name]:
+                fresh._words.extend((word, name) for word in set(name.split()))
+                fresh._name_grams[name] = trigrams(name)
+                for gram in fresh._name_grams[name]:
+                    fresh._grams[gram].add(name)
+            fresh._ids[name].add(medicine_id)
+            fresh._names_by_id[medicine_id] = name
+        fresh._words.sort()
+        with self._lock:
+            self._ids, self._words, self._grams = fresh._ids, fresh._words, fresh._grams
+            self._name_grams, self._names_by_id = fresh._name_grams, fresh._names_by_id
+            self.built_at = time.monotonic()
+
+    def ensure_fresh(self, db):
+        if self.built_at is None or time.monotonic() - self.built_at > SEARCH_INDEX_REFRESH_SECONDS:
+            self.rebuild(db)
+
+    def invalidate(self):
+        """Force a rebuild on the next search."""
+        self.built_at = None
+
+    def search(self, query: str, limit: int) -> list[list[int]]:
+        """Medicine ids grouped by name for the best ``limit`` names, best first."""
+        query = normalize(query)
+        if not query:
+            return []
+
+        scores = {}
+        with self._lock:
+            # Prefix matches: every query word must start a word of the name.
+            # Only the most selective word is looked up in the sorted word
+            # list; the other words are checked against its few candidates.
+            ranges = []
+            for word in query.split():
+                lo = bisect.bisect_left(self._words, (word,))
+                hi = bisect.bisect_left(self._words, (word + "\uffff",), lo)
+                ranges.append((hi - lo, lo, hi, word))
+            _, lo, hi, _ = min(ranges)
+            candidates = {name for _, name in self._words[lo:hi]}
+            for _, _, _, word in ranges:
+                candidates = {n for n in candidates if any(w.startswith(word) for w in n.split())}
+
+            # Names starting with the query rank above inner-word matches
+            for name in candidates:
+                scores[name] = 3.0 if name.startswith(query) else 2.0
+
+            # Typo-tolerant matches by trigram similarity, when the query is
+            # not a prefix of anything. A name reaching the threshold shares
+            # at least min_shared grams with the query, so it must contain
+            # one of the len - min_shared + 1 rarest ones.
+            if not scores:
+                query_grams = trigrams(query)
+                min_shared = max(1, math.ceil(SEARCH_MIN_SIMILARITY * len(query_grams)))
+                rarest = sorted(query_grams, key=lambda gram: len(self._grams.get(gram, ())))
+                candidates = set()
+                for gram in rarest[:len(query_grams) - min_shared + 1]:
+                    candidates.update(self._grams.get(gram, ()))
+                for name in candidates:
+                    if name in scores:
+                        continue
+                    count = len(query_grams & self._name_grams[name])
+                    similarity = count / (len(query_grams) + len(self._name_grams[name]) - count)
+                    if similarity >= SEARCH_MIN_SIMILARITY:
+                        scores[name] = similarity
+
+            ranked = sorted(scores, key=lambda name: (-scores[name], len(name), name))
+            return [sorted(self._ids[name]) for name in ranked[:limit]]
+
+
+medicine_index = NameIndex()
@@ -0,0 +1,67 @@
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+
+import orjson
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+def _default(value):
+    # Money columns come back from the driver as Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """Default response class: orjson handles dates, datetimes and Decimal natively."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(content: Any) -> FastJSONResponse:
+    """Serialize ``content`` straight to JSON, skipping FastAPI's jsonable_encoder pass."""
+    return FastJSONResponse(content)
+
+
+def requested_fields(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return for each row, e.g. id,name; all when omitted")
+) -> Optional[list[str]]:
+    """Dependency for the ``fields=`` projection parameter of list and report endpoints."""
+    names = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    return names or None
+
+
+def projection(fields: Optional[list[str]], allowed: Iterable[str]) -> Optional[set]:
+    """The requested field names checked against ``allowed``; None means every field."""
+    if fields is None:
+        return None
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return set(fields)
+
+
+def project_rows(rows: list[dict], fields: Optional[set]) -> list[dict]:
+    if fields is None:
+        return rows
+    return [{key: value for key, value in row.items() if key in fields} for row in rows]
+
+
+def list_response(adapter: TypeAdapter, items, response: Optional[Response] = None, fields: Optional[set] = None) -> Response:
+    """Validate ORM rows through a prebuilt list TypeAdapter and dump them in one pass.
+
+    ``fields`` (see projection) limits each row to those keys. Headers set
+    on the endpoint's injected ``response`` (e.g. the pagination cursor) are
+    carried over, since FastAPI ignores it once a Response is returned.
+    """
+    include = {"__all__": fields} if fields is not None else None
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True), include=include)
+    result = Response(body, media_type="application/json")
+    if response is not None:
+        result.raw_headers.extend(
+            (key, value) for key, value in response.raw_headers if key != b"content-length"
+        )
+    return result
@@ -0,0 +1,143 @@
+import os
+from datetime import timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Medicine, StockLevel
+from rollups import upsert
+
+load_dotenv()
+
+# Thresholds for products that have not been given their own
+DEFAULT_LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", 20))
+DEFAULT_NEAR_EXPIRY_DAYS = int(os.getenv("NEAR_EXPIRY_DAYS", 30))
+
+
+def stock_level_row(name, total_quantity, batch_count, earliest_expiry, low_stock_threshold, near_expiry_days) -> dict:
+    return {
+        "name": name,
+        "total_quantity": total_quantity,
+        "batch_count": batch_count,
+        "earliest_expiry": earliest_expiry,
+        "low_stock_threshold": low_stock_threshold,
+        "near_expiry_days": near_expiry_days,
+        "is_low": low_stock_threshold > 0 and total_quantity <= low_stock_threshold,
+        "expiry_alert_date": earliest_expiry - timedelta(days=near_expiry_days) if earliest_expiry else None,
+    }
+
+
+def _batch_stats(db: Session, names) -> dict:
+    """(batch count, earliest expiry) of each product's active, in-stock batches."""
+    return {
+        name: (count, expiry)
+        for name, count, expiry in db.execute(
+            select(Medicine.name, func.count(Medicine.id), func.min(Medicine.expiry_date))
+            .where(Medicine.is_active == True, Medicine.quantity > 0, Medicine.name.in_(names))
+            .group_by(Medicine.name)
+        )
+    }
+
+
+def adjust_stock_levels(db: Session, deltas: dict):
+    """Apply unit changes per product name (negative for sales and archiving) in the caller's transaction.
+
+    Call next to the batch writes. total_quantity and is_low are updated as
+    deltas in one UPDATE per product, so concurrent sales of different
+    batches of a product never lose a decrement. That UPDATE also locks the
+    product's row until commit; batch_count and earliest_expiry are then
+    re-aggregated from the product's batches. Products without a row yet
+    are computed in full.
+    """
+    present = []
+    missing = set()
+    for name in sorted(deltas):
+        # is_low first: MySQL evaluates SET clauses left to right
+        new_total = StockLevel.total_quantity + deltas[name]
+        result = db.execute(
+            update(StockLevel)
+            .where(StockLevel.name == name)
+            .ordered_values(
+                (StockLevel.is_low, and_(StockLevel.low_stock_threshold > 0, new_total <= StockLevel.low_stock_threshold)),
+                (StockLevel.total_quantity, new_total)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            present.append(name)
+        else:
+            missing.add(name)
+
+    if present:
+        stats = _batch_stats(db, present)
+        near_expiry_days = dict(
+            db.execute(select(StockLevel.name, StockLevel.near_expiry_days).where(StockLevel.name.in_(present))).all()
+        )
+        rows = []
+        for name in present:
+            count, expiry = stats.get(name, (0, None))
+            rows.append({
+                "name": name,
+                "batch_count": count,
+                "earliest_expiry": expiry,
+                "expiry_alert_date": expiry - timedelta(days=near_expiry_days[name]) if expiry else None,
+            })
+        db.execute(update(StockLevel).execution_options(synchronize_session=False), rows)
+
+    refresh_stock_levels(db, missing)
+
+
+def refresh_stock_levels(db: Session, names=None):
+    """Recompute the stock levels of the given product names (all when None) in the caller's transaction.
+
+    Each product's active batches are re-aggregated through
+    ix_medicines_active_name_expiry, so the cost grows with the number of
+    batches of the touched products, not the catalogue. Per-product
+    thresholds are kept. Writers should use adjust_stock_levels; this is for
+    backfills, new products and the expiry sweep's reconciliation.
+    """
+    if names is not None:
+        names = set(names)
+        if not names:
+            return
+
+    # Lock the existing rows first, in name order like adjust_stock_levels,
+    # so concurrent sales of these products finish before the aggregate
+    locked = select(StockLevel.name).order_by(StockLevel.name).with_for_update()
+    if names is not None:
+        locked = locked.where(StockLevel.name.in_(names))
+    db.execute(locked).all()
+
+    totals = (
+        select(Medicine.name, func.sum(Medicine.quantity), func.count(Medicine.id), func.min(Medicine.expiry_date))
+        .where(Medicine.is_active == True, Medicine.quantity > 0)
+        .group_by(Medicine.name)
+    )
+    thresholds = select(StockLevel.name, StockLevel.low_stock_threshold, StockLevel.near_expiry_days)
+    if names is not None:
+        totals = totals.where(Medicine.name.in_(names))
+        thresholds = thresholds.where(StockLevel.name.in_(names))
+
+    aggregates = {name: (quantity, count, expiry) for name, quantity, count, expiry in db.execute(totals)}
+    settings = {name: (low, days) for name, low, days in db.execute(thresholds)}
+
+    # Products whose last batch sold out or was archived drop to zero stock
+    rows = []
+    for name in sorted(aggregates.keys() | settings.keys()):
+        quantity, count, expiry = aggregates.get(name, (0, 0, None))
+        low, days = settings.get(name, (DEFAULT_LOW_STOCK_THRESHOLD, DEFAULT_NEAR_EXPIRY_DAYS))
+        rows.append(stock_level_row(name, quantity, count, expiry, low, days))
+
+    upsert(db, StockLevel, ["name"], rows)
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        refresh_stock_levels(db)
+        db.commit()
+        print("Rebuilt stock_levels")
+    finally:
+        db.close()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+from datetime import date
+
+from dotenv import load_dotenv
+from sqlalchemy import update
+
+from database import SessionLocal
+from models import Medicine
+from utils import log_activity
+from app_metrics import MEDICINES_ARCHIVED, count
+from search import medicine_index
+from stock import refresh_stock_levels
+from conditional import bump_versions
+from cache import dashboard_cache, DASHBOARD_MEDICINE_KEYS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds between expiry sweeps; 0 disables the in-process scheduler (e.g. when
+# the sweep is run from cron with `python tasks.py` instead).
+EXPIRY_SWEEP_INTERVAL_SECONDS = int(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", 3600))
+
+
+def archive_expired_medicines(db) -> int:
+    """Deactivate every active medicine past its expiry date in one UPDATE and refresh stock levels."""
+    result = db.execute(
+        update(Medicine)
+        .where(Medicine.expiry_date < date.today(), Medicine.is_active == True)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
+    archived = result.rowcount
+
+    if archived:
+        log_activity(
+            db=db,
+            type="archiving",
+            message=f"Expiry sweep archived {archived} expired medicine batch(es)"
+        )
+
+    # Full refresh: also reconciles batch counts and earliest expiries that a
+    # writer computed from a stale snapshot (MySQL REPEATABLE READ)
+    refresh_stock_levels(db)
+
+    if archived:
+        bump_versions(db, Medicine)
+    db.commit()
+    if archived:
+        dashboard_cache.invalidate(*DASHBOARD_MEDICINE_KEYS)
+        count(MEDICINES_ARCHIVED.labels("expired"), archived)
+        medicine_index.invalidate()
+
+    return archived
+
+
+def sweep_expired_medicines() -> int:
+    db = SessionLocal()
+    try:
+        return archive_expired_medicines(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_expiry_sweeper(interval: int):
+    while True:
+        try:
+            archived = await asyncio.to_thread(sweep_expired_medicines)
+            logger.info("Expiry sweep archived %d medicine(s)", archived)
+        except Exception:
+            logger.exception("Expiry sweep failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    print(f"Archived {sweep_expired_medicines()} expired medicine(s)")
@@ -0,0 +1,50 @@
+"""Run the app against scratch SQLite files: a primary and a read replica.
+
+database.py reads its configuration when first imported, so the environment
+is set here, before any test module imports the app.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = tempfile.mkdtemp(prefix="pharmize_tests_")
+PRIMARY_PATH = os.path.join(DATA_DIR, "primary.db")
+REPLICA_PATH = os.path.join(DATA_DIR, "replica.db")
+
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{PRIMARY_PATH}"
+os.environ["SQLALCHEMY_READ_DATABASE_URL"] = f"sqlite:///{REPLICA_PATH}"
+os.environ["EXPIRY_SWEEP_INTERVAL_SECONDS"] = "0"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("FRONTEND_URL", "http://localhost")
+sys.path.insert(0, BACKEND_DIR)
+
+
+def replicate():
+    """Bring the replica up to date with the primary, as replication would."""
+    from database import read_engine
+
+    read_engine.dispose()
+    with sqlite3.connect(PRIMARY_PATH) as primary, sqlite3.connect(REPLICA_PATH) as replica:
+        primary.backup(replica)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    replicate()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    client.post("/create_user", json={"username": "tester", "email": "tester@example.com", "password": "secret"})
+    token = client.post("/login", json={"email": "tester@example.com", "password": "secret"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
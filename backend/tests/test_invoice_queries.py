@@ -0,0 +1,51 @@
+"""The invoice listing must cost a fixed number of queries, however many invoices and items it returns."""
+from profiling import QUERY_COUNT_HEADER
+
+
+def _create(client, headers, path, payload, key):
+    response = client.post(path, json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()[key]
+
+
+def _seed_invoices(client, headers, cuid, medicine_ids, count):
+    for day in range(count):
+        _create(client, headers, "/invoice/create", {
+            "CUID": cuid,
+            "date": f"2026-01-{day % 28 + 1:02d}",
+            "discount": 0,
+            "finalTotal": 10,
+            "items": [{"medicineId": medicine_id, "quantity": 1, "unitPrice": 5} for medicine_id in medicine_ids],
+        }, "invoice_id")
+
+
+def _query_count(client, headers, cuid):
+    response = client.get(f"/invoices?customer_id={cuid}", headers=headers)
+    assert response.status_code == 200, response.text
+    return len(response.json()), int(response.headers[QUERY_COUNT_HEADER])
+
+
+def test_invoice_list_query_count_does_not_grow_with_invoices(client, auth_headers):
+    suid = _create(client, auth_headers, "/supplier/create", {
+        "name": "Query Count Supplier", "phone": "1", "email": "supplier@example.com", "address": "a"
+    }, "SUID")
+    customers = [
+        _create(client, auth_headers, "/customer/create", {
+            "name": f"Query Count Customer {i}", "phone": "1", "email": "customer@example.com", "address": "a"
+        }, "CUID")
+        for i in range(2)
+    ]
+    _create(client, auth_headers, "/medicine/create", [
+        {"name": f"Query Count Med {i}", "batchNumber": f"QC{i}", "entryDate": "2026-01-01",
+         "expiryDate": "2099-01-01", "quantity": 1000, "costPrice": 2.5, "SUID": suid}
+        for i in range(2)
+    ], "P_ID")
+    medicine_ids = [m["id"] for m in client.get("/medicines?name=Query Count Med", headers=auth_headers).json()]
+
+    _seed_invoices(client, auth_headers, customers[0], medicine_ids, 1)
+    _seed_invoices(client, auth_headers, customers[1], medicine_ids, 50)
+
+    one = _query_count(client, auth_headers, customers[0])
+    many = _query_count(client, auth_headers, customers[1])
+    assert (one[0], many[0]) == (1, 50)
+    assert one[1] == many[1]
@@ -0,0 +1,28 @@
+"""Every hot report, dashboard and list query must be served by an index (see bench/explain_queries.py)."""
+import os
+import sys
+
+from sqlalchemy import create_engine
+
+from conftest import BACKEND_DIR
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "bench"))
+
+import explain_queries  # noqa: E402
+
+
+def test_hot_queries_use_indexes(tmp_path):
+    # A database of its own: the seed assumes empty tables
+    engine = create_engine(f"sqlite:///{tmp_path}/plans.db")
+    try:
+        results = explain_queries.check_plans(engine, rows=5000)
+    finally:
+        engine.dispose()
+
+    full_scans = {name: plan for name, full_scan, plan in results if full_scan}
+    assert not full_scans
+
+    # Walking another index and filtering each row is no better than a scan:
+    # the supplier filter must be the index search itself
+    plans = {name: plan for name, _, plan in results}
+    assert any("(SUID=?)" in line for line in plans["medicines: supplier's batches"])
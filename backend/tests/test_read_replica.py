@@ -0,0 +1,94 @@
+"""Reads go to the replica unless the client just wrote or the replica is lagging.
+
+A customer that exists only in the replica tells the two databases apart.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import insert
+
+from conftest import BACKEND_DIR, replicate
+from database import DB_ASYNC, REPLICA_STICKY_COOKIE, SessionLocal, read_engine, replica_guard
+from models import Customer
+
+MARKER = "Replica Only Customer"
+
+
+@pytest.fixture(scope="module")
+def reader(client):
+    """Auth headers for a client that has never written."""
+    client.post("/create_user", json={"username": "reader", "email": "reader@example.com", "password": "secret"})
+    token = client.post("/login", json={"email": "reader@example.com", "password": "secret"}).json()["access_token"]
+
+    replicate()
+    with read_engine.begin() as conn:
+        conn.execute(insert(Customer).values(name=MARKER, phone="1", email="replica@example.com", address="a"))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def no_sticky_cookie(client):
+    client.cookies.clear()
+
+
+def _reads_replica(client, headers, **kwargs) -> bool:
+    response = client.get("/customers", params={"name": MARKER}, headers=headers, **kwargs)
+    assert response.status_code == 200, response.text
+    return len(response.json()) == 1
+
+
+def test_reads_go_to_the_replica(client, reader):
+    assert _reads_replica(client, reader)
+
+
+def test_sticky_cookie_reads_the_primary(client, reader):
+    client.cookies.set(REPLICA_STICKY_COOKIE, "1")
+    assert not _reads_replica(client, reader)
+
+
+def test_recent_write_reads_the_primary(client, reader, auth_headers):
+    response = client.post("/customer/create", json={
+        "name": "Written Customer", "phone": "1", "email": "written@example.com", "address": "a"
+    }, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert REPLICA_STICKY_COOKIE in response.cookies
+
+    # Sticky by token even for clients that drop the cookie
+    client.cookies.clear()
+    assert not _reads_replica(client, auth_headers)
+    assert _reads_replica(client, reader)
+
+
+def test_lagging_replica_is_bypassed(client, reader, monkeypatch):
+    monkeypatch.setattr(replica_guard, "_measure_lag", lambda: 60.0)
+    monkeypatch.setattr(replica_guard, "_lag", None)
+    monkeypatch.setattr(replica_guard, "_lag_checked_at", None)
+    assert not _reads_replica(client, reader)
+
+
+def test_dashboard_cache_fills_from_the_primary(client, reader):
+    from cache import dashboard_cache, DASHBOARD_TOTALS
+
+    # Two writes the replica has not seen put the primary's count above the
+    # replica's, which has only the marker on top of the last copy
+    with SessionLocal() as db:
+        db.add_all([Customer(name=f"Unreplicated {i}", phone="1", email="u@example.com", address="a") for i in range(2)])
+        db.commit()
+        primary_count = db.query(Customer).count()
+
+    dashboard_cache.invalidate(DASHBOARD_TOTALS)
+    response = client.get("/dashboard/totals", headers=reader)
+    assert response.status_code == 200, response.text
+    assert response.json()["customers"] == primary_count
+
+
+@pytest.mark.skipif(DB_ASYNC, reason="already running in async mode")
+def test_async_mode():
+    """Run this module again with DB_ASYNC enabled."""
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", os.path.abspath(__file__)],
+        cwd=BACKEND_DIR, env={**os.environ, "DB_ASYNC": "1"}, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
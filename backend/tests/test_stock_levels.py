@@ -0,0 +1,66 @@
+"""stock_levels must keep matching the product's active batches as invoices are written."""
+from sqlalchemy import select
+
+from allocation import take_stock
+from database import SessionLocal
+from models import Medicine, StockLevel
+from stock import refresh_stock_levels
+
+PRODUCT = "Stock Level Test Med"
+
+
+def _create(client, headers, path, payload, key):
+    response = client.post(path, json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()[key]
+
+
+def _level():
+    with SessionLocal() as db:
+        return db.execute(
+            select(StockLevel.total_quantity, StockLevel.batch_count, StockLevel.is_low).where(StockLevel.name == PRODUCT)
+        ).one()
+
+
+def _invoice(client, headers, cuid, medicine_id, quantity):
+    return client.post("/invoice/create", json={
+        "CUID": cuid, "date": "2026-01-01", "discount": 0, "finalTotal": 10,
+        "items": [{"medicineId": medicine_id, "quantity": quantity, "unitPrice": 5}],
+    }, headers=headers)
+
+
+def test_archived_batch_cannot_be_sold(client, auth_headers):
+    suid = _create(client, auth_headers, "/supplier/create", {
+        "name": "Stock Level Supplier", "phone": "1", "email": "supplier@example.com", "address": "a"
+    }, "SUID")
+    cuid = _create(client, auth_headers, "/customer/create", {
+        "name": "Stock Level Customer", "phone": "1", "email": "customer@example.com", "address": "a"
+    }, "CUID")
+    _create(client, auth_headers, "/medicine/create", [
+        {"name": PRODUCT, "batchNumber": f"SL{i}", "entryDate": "2026-01-01", "expiryDate": "2099-01-01",
+         "quantity": 30, "costPrice": 2.5, "SUID": suid}
+        for i in range(2)
+    ], "P_ID")
+    with SessionLocal() as db:
+        archived, active = db.scalars(select(Medicine.id).where(Medicine.name == PRODUCT).order_by(Medicine.id)).all()
+    assert _level() == (60, 2, False)
+
+    assert client.patch(f"/medicine/{archived}/archive", headers=auth_headers).status_code == 200
+    assert _level() == (30, 1, False)
+
+    response = _invoice(client, auth_headers, cuid, archived, 25)
+    assert response.status_code == 400, response.text
+    assert _level() == (30, 1, False)
+    with SessionLocal() as db:
+        assert db.get(Medicine, archived).quantity == 30
+        # The UPDATE itself refuses archived batches, for sales racing the archive
+        assert not take_stock(db, archived, 1)
+
+    assert _invoice(client, auth_headers, cuid, active, 25).status_code == 200
+    assert _level() == (5, 1, True)
+
+    # The deltas agree with a full recomputation
+    with SessionLocal() as db:
+        refresh_stock_levels(db, [PRODUCT])
+        db.commit()
+    assert _level() == (5, 1, True)
@@ -3,8 +3,10 @@ from models import ActivityLog
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+IST = timezone("Asia/Kolkata")
+
 def log_activity(db: Session, type: str, message: str):
-    ist = timezone("Asia/Kolkata")
-    log = ActivityLog(type=type, message=message, timestamp=datetime.now(ist))
+    # Only adds the entry to the session: it is committed together with the
+    # caller's business write, so logging costs no extra transaction.
+    log = ActivityLog(type=type, message=message, timestamp=datetime.now(IST))
     db.add(log)
-    db.commit()
@@ -299,7 +299,7 @@ useEffect(() => {
       </h3>
       <ul className="text-sm mt-2">
         {lowQuantityMedicines.map((m) => (
-          <li key={m.id} className="flex justify-between">
+          <li key={m.name} className="flex justify-between">
             <span>{m.name}</span>
             <span>{m.quantity}</span>
           </li>
@@ -319,7 +319,7 @@ useEffect(() => {
       </h3>
       <ul className="text-sm mt-2">
         {nearExpiryMedicines.map((m) => (
-          <li key={m.id} className="flex justify-between">
+          <li key={m.name} className="flex justify-between">
             <span>{m.name}</span>
             <span>{new Date(m.expiry_date).toLocaleDateString()}</span>
           </li>